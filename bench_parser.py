@@ -0,0 +1,200 @@
+"""Benchmark do parser com páginas de canal salvas.
+
+Uso:
+    python bench_parser.py pagina1.html pagina2.html ... [--runs 20]
+    python bench_parser.py --selftest
+        Confere o parser com páginas montadas aqui (sem internet), ex.: live
+        e live programada numa prateleira depois dos uploads.
+
+Salve as páginas com algo como:
+    curl -L -A "Mozilla/5.0" https://www.youtube.com/@canal > canal.html
+"""
+import re
+import sys
+import json
+import time
+from itertools import islice
+
+import youtube_parser
+import fallback_scanner
+
+
+def timed(func, html, runs):
+    """Melhor tempo (ms) de `runs` execuções e a descrição do último resultado"""
+    best = None
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            result = describe(func(html))
+        except Exception as e:
+            result = describe(e)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+# ========== ytInitialData ==========
+def old_initial_data(html):
+    """Versão antiga: regex preguiçosa com DOTALL + json.loads"""
+    match = re.search(r'var ytInitialData\s*=\s*({.*?});', html, re.DOTALL)
+    if not match:
+        return None
+    return json.loads(match.group(1))
+
+def new_initial_data_stdlib(html):
+    """Localizador novo usando só json.raw_decode"""
+    fast = youtube_parser.fast_json_loads
+    youtube_parser.fast_json_loads = None
+    try:
+        return youtube_parser.find_initial_data(html)
+    finally:
+        youtube_parser.fast_json_loads = fast
+
+FAST_BACKEND = youtube_parser.load_json_backend('orjson,ujson')
+
+def new_initial_data(html):
+    """Localizador novo com o backend JSON rápido instalado (se houver)"""
+    fast = youtube_parser.fast_json_loads
+    youtube_parser.fast_json_loads = FAST_BACKEND
+    try:
+        return youtube_parser.find_initial_data(html)
+    finally:
+        youtube_parser.fast_json_loads = fast
+
+# ========== Fallback por regex ==========
+# Mesma ordem do parse_channel_page; live_info só roda se achou live
+FALLBACK_SLOTS = ['channel_name', 'channel_id', 'is_live', 'live_info', 'videos', 'simple_video']
+
+def old_fallback(html):
+    """Versão antiga: re.search/re.findall com o padrão em texto, findall na página toda"""
+    hits = {}
+    for slot in FALLBACK_SLOTS:
+        if slot == 'live_info' and 'is_live' not in hits:
+            continue
+        patterns, flags, accept = fallback_scanner.SLOTS[slot]
+        for pattern in patterns:
+            if slot == 'videos':
+                matches = re.findall(pattern, html, flags)
+                if matches:
+                    hits[slot] = matches[:5]
+                    break
+                continue
+            match = re.search(pattern, html, flags)
+            if match and (accept is None or accept(match)):
+                hits[slot] = match
+                break
+    return hits
+
+def new_fallback(html):
+    """Scanner novo: padrões pré-compilados, portões e finditer limitado"""
+    hits = {}
+    for slot in FALLBACK_SLOTS:
+        if slot == 'live_info' and 'is_live' not in hits:
+            continue
+        hit = fallback_scanner.find(html, slot)
+        if hit and slot == 'videos':
+            index, first = hit
+            hits[slot] = list(islice(fallback_scanner.iter_matches(slot, index, html, first.start()), 5))
+        elif hit:
+            hits[slot] = hit
+    return hits
+
+def describe(result):
+    if isinstance(result, Exception):
+        return f"ERRO ({type(result).__name__})"
+    if result is None:
+        return "não encontrado"
+    if isinstance(result, dict):
+        return f"{len(result)} campos"
+    return "ok"
+
+BENCHMARKS = [
+    ('ytInitialData', [
+        ('regex DOTALL + json.loads', old_initial_data),
+        ('substring + raw_decode', new_initial_data_stdlib),
+        ('substring + backend rápido', new_initial_data),
+    ]),
+    ('fallback por regex', [
+        ('cadeia de re.search', old_fallback),
+        ('scanner pré-compilado', new_fallback),
+    ]),
+]
+
+
+# ========== AUTOTESTE ==========
+def grid_video(video_id, live=False, start_time=None):
+    """videoRenderer mínimo: upload, live (selo AO VIVO) ou live programada"""
+    renderer = {'videoId': video_id, 'title': {'runs': [{'text': f'Vídeo {video_id}'}]},
+                'publishedTimeText': {'simpleText': 'há 1 hora'}}
+    if live:
+        renderer['badges'] = [{'metadataBadgeRenderer': {'style': 'BADGE_STYLE_TYPE_LIVE_NOW'}}]
+    if start_time:
+        renderer['upcomingEventData'] = {'startTime': str(start_time)}
+    return {'gridVideoRenderer': renderer}
+
+def shelf(*items):
+    return {'itemSectionRenderer': {'contents': [{'shelfRenderer': {'content': {
+        'gridRenderer': {'items': list(items)}}}}]}}
+
+def channel_page(*shelves):
+    data = {
+        'metadata': {'channelMetadataRenderer': {'title': 'Canal Teste', 'externalId': 'UCselftest'}},
+        'contents': {'twoColumnBrowseResultsRenderer': {'tabs': [{'tabRenderer': {
+            'selected': True, 'content': {'sectionListRenderer': {'contents': list(shelves)}}}}]}},
+    }
+    return f'<html><body><script>var ytInitialData = {json.dumps(data)};</script></body></html>'
+
+def selftest():
+    """Casos que já quebraram o parser; levanta AssertionError se algum voltar"""
+    uploads = shelf(*(grid_video(f'up{i}') for i in range(youtube_parser.MAX_RECENT_VIDEOS + 1)))
+    
+    # Live e programada depois de uma prateleira com mais uploads que o limite
+    html = channel_page(uploads, shelf(grid_video('live1', live=True)),
+                        shelf(grid_video('soon1', start_time=1900000000)))
+    info = youtube_parser.parse_channel_page(html, 'https://www.youtube.com/@selftest')
+    assert info['channel_id'] == 'UCselftest', info['channel_id']
+    assert len(info['recent_videos']) == youtube_parser.MAX_RECENT_VIDEOS, info['recent_videos']
+    assert info['latest_video']['id'] == 'up0', info['latest_video']
+    assert info['is_live'] and info['live_info']['id'] == 'live1', info['live_info']
+    assert info['scheduled_live'] and info['scheduled_live']['id'] == 'soon1', info['scheduled_live']
+    print("✅ Live e programada depois dos uploads")
+    
+    # Sem live nem programada: os campos ficam vazios
+    info = youtube_parser.parse_channel_page(channel_page(uploads), 'https://www.youtube.com/@selftest')
+    assert not info['is_live'] and info['live_info'] is None and info['scheduled_live'] is None
+    print("✅ Página sem live")
+    return 0
+
+
+def main(argv):
+    if '--selftest' in argv:
+        return selftest()
+    
+    runs = 20
+    if '--runs' in argv:
+        i = argv.index('--runs')
+        runs = int(argv[i + 1])
+        del argv[i:i + 2]
+    
+    if not argv:
+        print(__doc__)
+        return 1
+    
+    print(f"Backend JSON rápido: {FAST_BACKEND.__module__ if FAST_BACKEND else 'nenhum'} • {runs} execuções")
+    
+    for path in argv:
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        print(f"\n📄 {path} ({len(html) / 1024:.0f} KB)")
+        
+        for group, funcs in BENCHMARKS:
+            print(f"  {group}:")
+            for name, func in funcs:
+                ms, result = timed(func, html, runs)
+                print(f"    {name:<32} {ms:9.2f} ms  {result}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -2,13 +2,28 @@ import discord
 import aiohttp
 import asyncio
 import sqlite3
+import heapq
+import random
+import time
 import os
-import re
-import json
+import functools
+import itertools
+import bisect
+import difflib
+import unicodedata
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
+from youtube_parser import (parse_channel_page, page_fingerprint, VideoFeedParser, ChannelPageReader,
+                            MAX_RECENT_VIDEOS)
+from dispatcher import NotificationDispatcher, LIVE, NORMAL
+from snapshot_cache import SnapshotCache, channel_key, key_url
+
 # ========== CONFIGURAÇÃO ==========
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
@@ -17,13 +32,236 @@ if not TOKEN:
     print("❌ DISCORD_TOKEN não encontrado no .env")
     exit(1)
 
+# Sessão HTTP compartilhada (conexões reaproveitadas entre verificações)
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+HTTP_LIMIT_PER_HOST = int(os.getenv('HTTP_LIMIT_PER_HOST', '20'))
+HTTP_KEEPALIVE = float(os.getenv('HTTP_KEEPALIVE', '60'))
+HTTP_DNS_TTL = int(os.getenv('HTTP_DNS_TTL', '300'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+
+# Páginas de canal: analisadas só até o fim do ytInitialData, no máximo
+# PAGE_MAX_BYTES. O download só é interrompido se faltarem ao menos
+# PAGE_EARLY_STOP_TAIL bytes (interromper fecha a conexão keep-alive)
+PAGE_MAX_BYTES = int(os.getenv('PAGE_MAX_BYTES', str(4 * 1024 * 1024)))
+PAGE_EARLY_STOP_TAIL = int(os.getenv('PAGE_EARLY_STOP_TAIL', str(256 * 1024)))
+PAGE_CHUNK = 65536
+
+# Monitor: quantos canais verificados ao mesmo tempo e tempo máximo por canal
+MONITOR_CONCURRENCY = max(1, int(os.getenv('MONITOR_CONCURRENCY', '8')))
+CHANNEL_TIMEOUT = float(os.getenv('CHANNEL_TIMEOUT', '20'))
+
+# Feed Atom de vídeos para canais com ID UC... (0 = sempre baixa a página inteira)
+YOUTUBE_FEEDS = os.getenv('YOUTUBE_FEEDS', '1') != '0'
+FEED_URL = 'https://www.youtube.com/feeds/videos.xml?channel_id={}'
+
+# Endereço canônico dos canais UC...: @handle, /c/ e URLs antigas são
+# resolvidos uma vez (tabela channel_aliases) e revalidados em segundo plano
+CHANNEL_URL = 'https://www.youtube.com/channel/{}'
+ALIAS_REVALIDATE_HOURS = float(os.getenv('ALIAS_REVALIDATE_HOURS', '12'))
+ALIAS_MAX_AGE_DAYS = int(os.getenv('ALIAS_MAX_AGE_DAYS', '7'))
+
+# Agendador: intervalo de cada canal entre POLL_MIN e POLL_MAX segundos,
+# conforme a atividade dos últimos ACTIVITY_DAYS dias (e mínimo se em live)
+POLL_MIN = max(5, int(os.getenv('POLL_MIN', '30')))
+POLL_MAX = max(POLL_MIN, int(os.getenv('POLL_MAX', '900')))
+POLL_JITTER = float(os.getenv('POLL_JITTER', '0.1'))
+ACTIVITY_DAYS = int(os.getenv('ACTIVITY_DAYS', '14'))
+ACTIVITY_REFRESH = 600
+SCHEDULER_TICK = 5
+
+# Lives programadas: de LIVE_BURST_BEFORE s antes até LIVE_BURST_AFTER s depois
+# do horário marcado, o canal é verificado a cada LIVE_BURST_INTERVAL s
+LIVE_BURST_BEFORE = int(os.getenv('LIVE_BURST_BEFORE', '120'))
+LIVE_BURST_AFTER = int(os.getenv('LIVE_BURST_AFTER', '900'))
+LIVE_BURST_INTERVAL = max(SCHEDULER_TICK, int(os.getenv('LIVE_BURST_INTERVAL', '10')))
+
+# Canais com feed e alguém querendo lives: a página (só ela mostra lives) é
+# baixada em toda verificação (0, padrão) ou no máximo a cada
+# LIVE_PAGE_INTERVAL s. Um valor maior economiza downloads, mas atrasa o
+# alerta de live em até LIVE_PAGE_INTERVAL s (em live ou na rajada de uma
+# live programada a página é baixada sempre)
+LIVE_PAGE_INTERVAL = max(0, int(os.getenv('LIVE_PAGE_INTERVAL', '0')))
+
+# WebSub (push do YouTube): desligado sem WEBSUB_CALLBACK_URL, a URL pública
+# que aponta para WEBSUB_HOST:WEBSUB_PORT. Canais com assinatura ativa e sem
+# ninguém querendo lives caem para uma verificação a cada PUSH_SAFETY_POLL s
+WEBSUB_CALLBACK_URL = os.getenv('WEBSUB_CALLBACK_URL', '')
+WEBSUB_HUB = os.getenv('WEBSUB_HUB', 'https://pubsubhubbub.appspot.com/subscribe')
+WEBSUB_HOST = os.getenv('WEBSUB_HOST', '0.0.0.0')
+WEBSUB_PORT = int(os.getenv('WEBSUB_PORT', '8080'))
+WEBSUB_SECRET = os.getenv('WEBSUB_SECRET') or None
+WEBSUB_LEASE = int(os.getenv('WEBSUB_LEASE', str(5 * 24 * 3600)))
+PUSH_SAFETY_POLL = int(os.getenv('PUSH_SAFETY_POLL', '3600'))
+
+# Histórico: eventos mais velhos que HISTORY_RETENTION_DAYS dias (0 = guarda
+# tudo) são apagados a cada HISTORY_PRUNE_HOURS horas, nunca antes de ACTIVITY_DAYS
+HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', '90'))
+HISTORY_PRUNE_HOURS = float(os.getenv('HISTORY_PRUNE_HOURS', '6'))
+HISTORY_PAGE_SIZE = 10
+
+# Escritas em fila: com o banco ocupado/travado a fila volta para o próximo
+# flush, no máximo FLUSH_MAX_RETRIES vezes seguidas (depois é descartada)
+FLUSH_MAX_RETRIES = max(0, int(os.getenv('FLUSH_MAX_RETRIES', '5')))
+
+# Vídeos já vistos guardados por canal (vídeo fora da lista volta a ser novo)
+SEEN_VIDEOS_MAX = max(MAX_RECENT_VIDEOS * 2, int(os.getenv('SEEN_VIDEOS_MAX', '50')))
+
+# !yt_now: canais verificados ao mesmo tempo, intervalo mínimo entre edições
+# da mensagem de progresso e prazo total (s)
+NOW_CONCURRENCY = max(1, int(os.getenv('NOW_CONCURRENCY', '6')))
+NOW_PROGRESS_INTERVAL = 2.0
+NOW_DEADLINE = float(os.getenv('NOW_DEADLINE', '45'))
+
+# Cache das informações analisadas, compartilhado por comandos e monitor:
+# validade (s), máximo de canais e tamanho total aproximado (bytes)
+SNAPSHOT_TTL = float(os.getenv('SNAPSHOT_TTL', '60'))
+SNAPSHOT_MAX_ENTRIES = int(os.getenv('SNAPSHOT_MAX_ENTRIES', '500'))
+SNAPSHOT_MAX_BYTES = int(os.getenv('SNAPSHOT_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Envio das notificações: ritmo por canal do Discord (mensagens/s e rajada)
+# e quantos envios podem estar em andamento ao mesmo tempo; WEBHOOK_TIMEOUT é
+# o tempo limite (s) de cada chamada aos webhooks
+DISPATCH_RATE = float(os.getenv('DISPATCH_RATE', '1'))
+DISPATCH_BURST = int(os.getenv('DISPATCH_BURST', '5'))
+DISPATCH_CONCURRENCY = max(1, int(os.getenv('DISPATCH_CONCURRENCY', '4')))
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '30'))
+
+# Processos para análise do HTML (0 = analisa no próprio event loop). Os
+# processos precisam de fork; sem ele a análise fica no event loop
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(min(4, os.cpu_count() or 1))))
+FORK_AVAILABLE = 'fork' in multiprocessing.get_all_start_methods()
+
+YOUTUBE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+}
+
+# ========== INSCRIÇÕES ==========
+CONFIG_COLUMNS = (
+    'id', 'server_id', 'channel_id', 'youtube_url', 'youtube_name', 'youtube_id',
+    'last_video', 'last_video_title', 'last_video_time', 'last_live', 'last_live_title',
+    'scheduled_live', 'scheduled_live_time', 'notify_videos', 'notify_lives',
+    'notify_scheduled', 'config_user', 'created', 'last_check', 'is_active',
+)
+CONFIG_FIELDS = ', '.join(CONFIG_COLUMNS)  # projeção explícita em vez de SELECT *
+
+class ChannelConfig:
+    """Uma inscrição (linha de configs) com os campos acessados por nome.
+    
+    Com __slots__ o objeto não tem __dict__: ocupa quase o mesmo que a tupla
+    da linha e é montado direto pelo row_factory do cursor."""
+    __slots__ = CONFIG_COLUMNS
+    
+    def __init__(self, *values):
+        for name, value in zip(CONFIG_COLUMNS, values):
+            setattr(self, name, value)
+    
+    @classmethod
+    def from_row(cls, cursor, row):
+        """row_factory do sqlite3 para consultas que projetam CONFIG_FIELDS"""
+        return cls(*row)
+    
+    def __repr__(self):
+        return f"ChannelConfig({self.server_id!r}, {self.youtube_id!r}, {self.youtube_name!r})"
+
 # ========== BANCO DE DADOS CORRIGIDO ==========
+def is_busy(error):
+    """Erro passageiro de banco ocupado/travado por outra conexão (vale tentar de novo)"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
 class YouTubeDB:
+    """Banco SQLite em modo WAL com fila de escrita (write-behind).
+    
+    As escritas do monitor (update_video/live/scheduled, add_history) e
+    update_setting só entram na fila; flush() grava tudo numa transação só,
+    agrupando comandos iguais com executemany. Toda leitura faz flush antes,
+    então ninguém lê dado velho, e o bot chama flush no fim de cada ciclo do
+    monitor e no encerramento.
+    
+    O histórico fica normalizado: `videos` guarda título e canal uma vez por
+    vídeo e `history_events` só o que cada servidor recebeu e quando."""
     def __init__(self):
         self.conn = sqlite3.connect('youtube_bot_v3.db', check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.pending = []
+        self.flush_retries = 0
+        self.enable_incremental_vacuum()
         self.create_tables()
+        self.migrate_history()
+        self.migrate_channel_urls()
         print("✅ Banco de dados V3 pronto")
     
+    def queue_write(self, sql, params):
+        """Põe uma escrita na fila (gravada no próximo flush)"""
+        self.pending.append((sql, params))
+    
+    def flush(self):
+        """Grava a fila numa única transação; devolve quantas escritas foram feitas"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        # Um executemany por sequência de comandos iguais, sem mudar a ordem da
+        # fila (ex.: INSERT e DELETE do mesmo vídeo em seen_videos)
+        try:
+            with self.conn:
+                for sql, group in itertools.groupby(pending, key=lambda write: write[0]):
+                    self.conn.executemany(sql, [params for _, params in group])
+        except sqlite3.Error as e:
+            # Banco ocupado: nada foi gravado, tenta de novo no próximo flush
+            if is_busy(e) and self.retry_later(pending, e):
+                return 0
+            print(f"❌ Erro gravando {len(pending)} escritas no banco, gravando uma a uma: {e}")
+            return self.flush_one_by_one(pending)
+        self.flush_retries = 0
+        return len(pending)
+    
+    def retry_later(self, pending, error):
+        """Devolve a fila para o próximo flush, até FLUSH_MAX_RETRIES vezes seguidas"""
+        if self.flush_retries >= FLUSH_MAX_RETRIES:
+            return False
+        self.flush_retries += 1
+        print(f"⏳ Banco ocupado gravando {len(pending)} escritas "
+              f"(tentativa {self.flush_retries}/{FLUSH_MAX_RETRIES}, tenta de novo depois): {error}")
+        self.pending = pending + self.pending
+        return True
+    
+    def flush_one_by_one(self, pending):
+        """Grava as escritas separadas, descartando só as que falham sozinhas"""
+        written = 0
+        try:
+            with self.conn:
+                for sql, params in pending:
+                    try:
+                        self.conn.execute(sql, params)
+                        written += 1
+                    except sqlite3.Error as e:
+                        if is_busy(e):
+                            raise
+                        print(f"❌ Escrita descartada ({e}): {' '.join(sql.split())[:80]}")
+        except sqlite3.Error as e:
+            if is_busy(e) and self.retry_later(pending, e):
+                return 0
+            print(f"❌ {len(pending)} escritas descartadas: {e}")
+            self.flush_retries = 0
+            return 0
+        self.flush_retries = 0
+        return written
+    
+    def close(self):
+        self.flush()
+        self.conn.close()
+    
+    def enable_incremental_vacuum(self):
+        """auto_vacuum=INCREMENTAL; num banco que já existe só vale depois de um VACUUM (feito uma vez)"""
+        if self.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return
+        self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.conn.execute('VACUUM')
+    
     def create_tables(self):
         c = self.conn.cursor()
         
@@ -54,28 +292,122 @@ class YouTubeDB:
             )
         ''')
         
-        # Histórico de notificações
+        # Vídeos/lives já notificados (um registro por vídeo, para todos os servidores)
         c.execute('''
-            CREATE TABLE IF NOT EXISTS history (
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                youtube_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                channel_name TEXT NOT NULL,
+                first_seen TEXT NOT NULL
+            )
+        ''')
+        
+        # Histórico de notificações: o que cada servidor recebeu e quando
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS history_events (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 server_id TEXT NOT NULL,
-                youtube_id TEXT NOT NULL,
                 video_id TEXT NOT NULL,
-                video_title TEXT NOT NULL,
                 video_type TEXT NOT NULL,
-                notified_at TEXT NOT NULL,
-                channel_name TEXT NOT NULL
+                notified_at TEXT NOT NULL
+            )
+        ''')
+        
+        # Últimos vídeos vistos de cada canal (seen_at dá a ordem de chegada)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS seen_videos (
+                youtube_id TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                seen_at INTEGER NOT NULL,
+                PRIMARY KEY (youtube_id, video_id)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Intervalo de verificação definido por um admin (em segundos)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS poll_overrides (
+                server_id TEXT NOT NULL,
+                youtube_id TEXT NOT NULL,
+                seconds INTEGER NOT NULL,
+                PRIMARY KEY (server_id, youtube_id)
             )
         ''')
         
+        # Webhook de entrega dos alertas, para canais que ligaram o modo webhook
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS webhooks (
+                channel_id TEXT PRIMARY KEY,
+                webhook_id TEXT NOT NULL,
+                token TEXT NOT NULL
+            )
+        ''')
+        
+        # @handle, c/nome ou URL (chave de channel_key) -> ID UC... do canal
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS channel_aliases (
+                alias TEXT PRIMARY KEY,
+                youtube_id TEXT NOT NULL,
+                checked_at TEXT NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        
         # Índices para melhor performance
         c.execute('CREATE INDEX IF NOT EXISTS idx_configs_server ON configs(server_id)')
         c.execute('CREATE INDEX IF NOT EXISTS idx_configs_active ON configs(is_active)')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_history_server ON history(server_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_events_server_time ON history_events(server_id, notified_at, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_events_notified ON history_events(notified_at)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_events_video ON history_events(video_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos(youtube_id)')
         
         self.conn.commit()
     
+    def migrate_history(self):
+        """Converte a tabela history antiga (título e canal repetidos em cada linha)"""
+        c = self.conn.cursor()
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history'")
+        if not c.fetchone():
+            return
+        
+        with self.conn:
+            c.execute('''
+                INSERT OR IGNORE INTO videos (video_id, youtube_id, title, channel_name, first_seen)
+                SELECT video_id, youtube_id, video_title, channel_name, MIN(notified_at)
+                FROM history GROUP BY video_id
+            ''')
+            c.execute('''
+                INSERT INTO history_events (server_id, video_id, video_type, notified_at)
+                SELECT server_id, video_id, video_type, notified_at
+                FROM history ORDER BY notified_at, id
+            ''')
+            migrated = c.rowcount
+            c.execute('DROP TABLE history')
+        print(f"✅ Histórico convertido: {migrated} notificações")
+    
+    def migrate_channel_urls(self):
+        """Inscrições com ID UC... e URL de @handle/c/: guarda o apelido e passa a usar /channel/UC..."""
+        c = self.conn.cursor()
+        c.execute('''
+            SELECT DISTINCT youtube_url, youtube_id FROM configs
+            WHERE is_active = 1 AND youtube_id LIKE 'UC%' AND youtube_url != ? || youtube_id
+        ''', (CHANNEL_URL.format(''),))
+        rows = c.fetchall()
+        if not rows:
+            return
+        
+        now = datetime.now().isoformat()
+        with self.conn:
+            c.executemany('INSERT OR IGNORE INTO channel_aliases (alias, youtube_id, checked_at) VALUES (?, ?, ?)',
+                          [(channel_key(url), youtube_id, now) for url, youtube_id in rows
+                           if channel_key(url) != f'channel/{youtube_id}'])
+            c.execute('''
+                UPDATE configs SET youtube_url = ? || youtube_id
+                WHERE is_active = 1 AND youtube_id LIKE 'UC%'
+            ''', (CHANNEL_URL.format(''),))
+        print(f"✅ {len(rows)} URL(s) de canal trocadas pelo endereço /channel/UC...")
+    
     def save_config(self, server_id, channel_id, youtube_url, youtube_name, youtube_id, user_id):
+        self.flush()
         c = self.conn.cursor()
         
         # Verifica se já existe configuração para este canal neste servidor
@@ -109,18 +441,25 @@ class YouTubeDB:
         self.conn.commit()
         return True
     
-    def get_config(self, server_id, youtube_id=None):
+    def config_cursor(self):
+        """Cursor que devolve ChannelConfig (para consultas com CONFIG_FIELDS)"""
         c = self.conn.cursor()
+        c.row_factory = ChannelConfig.from_row
+        return c
+    
+    def get_config(self, server_id, youtube_id=None):
+        self.flush()
+        c = self.config_cursor()
         
         if youtube_id:
-            c.execute('''
-                SELECT * FROM configs 
+            c.execute(f'''
+                SELECT {CONFIG_FIELDS} FROM configs 
                 WHERE server_id = ? AND youtube_id = ? AND is_active = 1
             ''', (str(server_id), youtube_id))
         else:
             # Retorna TODAS as configurações do servidor
-            c.execute('''
-                SELECT * FROM configs 
+            c.execute(f'''
+                SELECT {CONFIG_FIELDS} FROM configs 
                 WHERE server_id = ? AND is_active = 1
                 ORDER BY created DESC
             ''', (str(server_id),))
@@ -129,9 +468,10 @@ class YouTubeDB:
     
     def get_all_configs(self):
         """Retorna TODAS as configurações ativas de TODOS os servidores"""
-        c = self.conn.cursor()
-        c.execute('''
-            SELECT * FROM configs 
+        self.flush()
+        c = self.config_cursor()
+        c.execute(f'''
+            SELECT {CONFIG_FIELDS} FROM configs 
             WHERE is_active = 1
             ORDER BY server_id, created DESC
         ''')
@@ -139,9 +479,10 @@ class YouTubeDB:
     
     def get_active_configs(self):
         """Pega apenas configs que têm notificações ativas"""
-        c = self.conn.cursor()
-        c.execute('''
-            SELECT * FROM configs 
+        self.flush()
+        c = self.config_cursor()
+        c.execute(f'''
+            SELECT {CONFIG_FIELDS} FROM configs 
             WHERE is_active = 1 
             AND (notify_videos = 1 OR notify_lives = 1 OR notify_scheduled = 1)
             ORDER BY server_id, created DESC
@@ -150,6 +491,7 @@ class YouTubeDB:
     
     def get_server_configs_count(self, server_id):
         """Conta quantos canais um servidor está monitorando"""
+        self.flush()
         c = self.conn.cursor()
         c.execute('''
             SELECT COUNT(*) FROM configs 
@@ -158,65 +500,224 @@ class YouTubeDB:
         return c.fetchone()[0]
     
     def update_video(self, server_id, youtube_id, video_id, title, publish_time):
-        c = self.conn.cursor()
-        c.execute('''
+        self.queue_write('''
             UPDATE configs 
             SET last_video = ?, last_video_title = ?, last_video_time = ?, last_check = ?
             WHERE server_id = ? AND youtube_id = ? AND is_active = 1
         ''', (video_id, title, publish_time, datetime.now().isoformat(), 
               str(server_id), youtube_id))
-        self.conn.commit()
     
     def update_live(self, server_id, youtube_id, video_id, title):
-        c = self.conn.cursor()
-        c.execute('''
+        self.queue_write('''
             UPDATE configs 
             SET last_live = ?, last_live_title = ?, last_check = ?
             WHERE server_id = ? AND youtube_id = ? AND is_active = 1
         ''', (video_id, title, datetime.now().isoformat(), 
               str(server_id), youtube_id))
-        self.conn.commit()
     
     def update_scheduled(self, server_id, youtube_id, video_id, title, scheduled_time):
-        c = self.conn.cursor()
-        c.execute('''
+        self.queue_write('''
             UPDATE configs 
             SET scheduled_live = ?, scheduled_live_time = ?, last_check = ?
             WHERE server_id = ? AND youtube_id = ? AND is_active = 1
-        ''', (video_id, title, scheduled_time, datetime.now().isoformat(), 
+        ''', (video_id, scheduled_time, datetime.now().isoformat(),
               str(server_id), youtube_id))
-        self.conn.commit()
     
     def add_history(self, server_id, youtube_id, video_id, title, video_type, channel_name):
+        now = datetime.now().isoformat()
+        self.queue_write('''
+            INSERT INTO videos (video_id, youtube_id, title, channel_name, first_seen)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, channel_name = excluded.channel_name
+        ''', (video_id, youtube_id, title, channel_name, now))
+        self.queue_write('''
+            INSERT INTO history_events (server_id, video_id, video_type, notified_at)
+            VALUES (?, ?, ?, ?)
+        ''', (str(server_id), video_id, video_type, now))
+    
+    def get_history(self, server_id, limit=10, before=None):
+        """Notificações do servidor, mais novas primeiro: (id, video_id, título, tipo, quando, canal).
+        
+        `before` é o id do último evento da página anterior (cursor): a
+        próxima página continua pelo índice (server_id, notified_at, id), sem OFFSET."""
+        self.flush()
+        c = self.conn.cursor()
+        cursor = ''
+        params = [str(server_id)]
+        if before is not None:
+            cursor = 'AND (e.notified_at, e.id) < (SELECT notified_at, id FROM history_events WHERE id = ?)'
+            params.append(before)
+        c.execute(f'''
+            SELECT e.id, e.video_id, v.title, e.video_type, e.notified_at, v.channel_name
+            FROM history_events e JOIN videos v ON v.video_id = e.video_id
+            WHERE e.server_id = ? {cursor}
+            ORDER BY e.notified_at DESC, e.id DESC
+            LIMIT ?
+        ''', (*params, limit))
+        return c.fetchall()
+    
+    def get_seen_videos(self):
+        """(youtube_id, video_id) vistos, do mais antigo para o mais novo"""
+        self.flush()
+        c = self.conn.cursor()
+        c.execute('SELECT youtube_id, video_id FROM seen_videos ORDER BY seen_at')
+        return c.fetchall()
+    
+    def save_seen_videos(self, youtube_id, added, evicted):
+        """Grava (na fila) os vídeos que entraram e os que saíram do conjunto do canal"""
+        now = time.time_ns()
+        for index, video_id in enumerate(added):
+            self.queue_write('''
+                INSERT OR REPLACE INTO seen_videos (youtube_id, video_id, seen_at)
+                VALUES (?, ?, ?)
+            ''', (youtube_id, video_id, now + index))
+        for video_id in evicted:
+            self.queue_write('DELETE FROM seen_videos WHERE youtube_id = ? AND video_id = ?',
+                             (youtube_id, video_id))
+    
+    def prune_history(self, keep_since=None):
+        """Apaga eventos anteriores a `keep_since` (None = nenhum), vídeos sem eventos e
+        inscrições removidas, e devolve as páginas livres ao disco. Retorna as contagens."""
+        self.flush()
+        with self.conn:
+            events = 0
+            if keep_since is not None:
+                events = self.conn.execute('DELETE FROM history_events WHERE notified_at < ?',
+                                           (keep_since.isoformat(),)).rowcount
+            videos = self.conn.execute('''
+                DELETE FROM videos WHERE NOT EXISTS (
+                    SELECT 1 FROM history_events e WHERE e.video_id = videos.video_id
+                )
+            ''').rowcount
+            configs = self.conn.execute('DELETE FROM configs WHERE is_active = 0').rowcount
+            self.conn.execute('''
+                DELETE FROM seen_videos 
+                WHERE youtube_id NOT IN (SELECT youtube_id FROM configs WHERE is_active = 1)
+            ''')
+        self.conn.execute('PRAGMA incremental_vacuum').fetchall()
+        return events, videos, configs
+    
+    def get_channel_activity(self, since):
+        """Eventos (vídeos/lives) distintos por canal desde `since`: {youtube_id: quantidade}"""
+        self.flush()
         c = self.conn.cursor()
         c.execute('''
-            INSERT INTO history 
-            (server_id, youtube_id, video_id, video_title, video_type, notified_at, channel_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (str(server_id), youtube_id, video_id, title, video_type, 
-              datetime.now().isoformat(), channel_name))
+            SELECT v.youtube_id, COUNT(DISTINCT e.video_id)
+            FROM history_events e JOIN videos v ON v.video_id = e.video_id
+            WHERE e.notified_at >= ?
+            GROUP BY v.youtube_id
+        ''', (since.isoformat(),))
+        return dict(c.fetchall())
+    
+    def get_webhooks(self):
+        """{channel_id: (webhook_id, token)} dos canais em modo webhook"""
+        self.flush()
+        c = self.conn.cursor()
+        c.execute('SELECT channel_id, webhook_id, token FROM webhooks')
+        return {int(channel_id): (int(webhook_id), token) for channel_id, webhook_id, token in c.fetchall()}
+    
+    def set_webhook(self, channel_id, webhook_id, token):
+        self.flush()
+        self.conn.execute('INSERT OR REPLACE INTO webhooks (channel_id, webhook_id, token) VALUES (?, ?, ?)',
+                          (str(channel_id), str(webhook_id), token))
+        self.conn.commit()
+    
+    def delete_webhook(self, channel_id):
+        self.flush()
+        self.conn.execute('DELETE FROM webhooks WHERE channel_id = ?', (str(channel_id),))
         self.conn.commit()
     
-    def get_history(self, server_id, limit=10):
+    def get_aliases(self):
+        """{apelido: youtube_id} já resolvidos"""
+        self.flush()
         c = self.conn.cursor()
-        c.execute('''
-            SELECT * FROM history 
-            WHERE server_id = ? 
-            ORDER BY notified_at DESC 
-            LIMIT ?
-        ''', (str(server_id), limit))
+        c.execute('SELECT alias, youtube_id FROM channel_aliases')
+        return dict(c.fetchall())
+    
+    def get_stale_aliases(self, checked_before):
+        """Apelidos não conferidos desde `checked_before`: [(apelido, youtube_id), ...]"""
+        self.flush()
+        c = self.conn.cursor()
+        c.execute('SELECT alias, youtube_id FROM channel_aliases WHERE checked_at < ? ORDER BY checked_at',
+                  (checked_before.isoformat(),))
         return c.fetchall()
     
-    def update_setting(self, server_id, youtube_id, setting, value):
+    def save_alias(self, alias, youtube_id):
+        self.flush()
+        self.conn.execute('INSERT OR REPLACE INTO channel_aliases (alias, youtube_id, checked_at) VALUES (?, ?, ?)',
+                          (alias, youtube_id, datetime.now().isoformat()))
+        self.conn.commit()
+    
+    def canonicalize_channel(self, old_id, youtube_id):
+        """Troca um ID provisório (@handle, c_..., custom_...) pelo ID UC... em tudo que é do canal.
+        
+        Servidor que já tinha o canal inscrito pelo ID UC... fica só com essa
+        inscrição. Retorna (inscrições movidas, inscrições juntadas)."""
+        self.flush()
         c = self.conn.cursor()
-        c.execute(f'''
+        moved = merged = 0
+        with self.conn:
+            c.execute('SELECT id, server_id FROM configs WHERE youtube_id = ? AND is_active = 1', (old_id,))
+            for config_id, server_id in c.fetchall():
+                c.execute('SELECT id, is_active FROM configs WHERE server_id = ? AND youtube_id = ?',
+                          (server_id, youtube_id))
+                existing = c.fetchone()
+                if existing and existing[1]:
+                    c.execute('UPDATE configs SET is_active = 0 WHERE id = ?', (config_id,))
+                    merged += 1
+                    continue
+                if existing:
+                    c.execute('DELETE FROM configs WHERE id = ?', (existing[0],))
+                c.execute('UPDATE configs SET youtube_id = ?, youtube_url = ? WHERE id = ?',
+                          (youtube_id, CHANNEL_URL.format(youtube_id), config_id))
+                moved += 1
+            
+            c.execute('UPDATE videos SET youtube_id = ? WHERE youtube_id = ?', (youtube_id, old_id))
+            for table in ('poll_overrides', 'seen_videos'):
+                c.execute(f'UPDATE OR IGNORE {table} SET youtube_id = ? WHERE youtube_id = ?', (youtube_id, old_id))
+                c.execute(f'DELETE FROM {table} WHERE youtube_id = ?', (old_id,))
+        return moved, merged
+    
+    def get_poll_overrides(self):
+        """Menor intervalo definido por admins para cada canal: {youtube_id: segundos}"""
+        self.flush()
+        c = self.conn.cursor()
+        c.execute('SELECT youtube_id, MIN(seconds) FROM poll_overrides GROUP BY youtube_id')
+        return dict(c.fetchall())
+    
+    def get_poll_override(self, server_id, youtube_id):
+        self.flush()
+        c = self.conn.cursor()
+        c.execute('''
+            SELECT seconds FROM poll_overrides 
+            WHERE server_id = ? AND youtube_id = ?
+        ''', (str(server_id), youtube_id))
+        row = c.fetchone()
+        return row[0] if row else None
+    
+    def set_poll_override(self, server_id, youtube_id, seconds):
+        """Define o intervalo do canal neste servidor (None volta ao automático)"""
+        self.flush()
+        c = self.conn.cursor()
+        if seconds:
+            c.execute('''
+                INSERT OR REPLACE INTO poll_overrides (server_id, youtube_id, seconds)
+                VALUES (?, ?, ?)
+            ''', (str(server_id), youtube_id, int(seconds)))
+        else:
+            c.execute('DELETE FROM poll_overrides WHERE server_id = ? AND youtube_id = ?',
+                      (str(server_id), youtube_id))
+        self.conn.commit()
+    
+    def update_setting(self, server_id, youtube_id, setting, value):
+        self.queue_write(f'''
             UPDATE configs 
             SET {setting} = ?, last_check = ?
             WHERE server_id = ? AND youtube_id = ? AND is_active = 1
         ''', (value, datetime.now().isoformat(), str(server_id), youtube_id))
-        self.conn.commit()
     
     def delete_config(self, server_id, youtube_id=None):
+        self.flush()
         c = self.conn.cursor()
         
         if youtube_id:
@@ -229,7 +730,11 @@ class YouTubeDB:
             deleted = c.rowcount > 0
             
             # Remove histórico específico
-            c.execute('DELETE FROM history WHERE server_id = ? AND youtube_id = ?', 
+            c.execute('''
+                DELETE FROM history_events 
+                WHERE server_id = ? AND video_id IN (SELECT video_id FROM videos WHERE youtube_id = ?)
+            ''', (str(server_id), youtube_id))
+            c.execute('DELETE FROM poll_overrides WHERE server_id = ? AND youtube_id = ?',
                      (str(server_id), youtube_id))
         else:
             # Remove TODAS as configurações do servidor
@@ -241,321 +746,700 @@ class YouTubeDB:
             deleted = c.rowcount > 0
             
             # Remove TODO o histórico do servidor
-            c.execute('DELETE FROM history WHERE server_id = ?', (str(server_id),))
+            c.execute('DELETE FROM history_events WHERE server_id = ?', (str(server_id),))
+            c.execute('DELETE FROM poll_overrides WHERE server_id = ?', (str(server_id),))
         
         self.conn.commit()
         return deleted
 
+def normalize_name(text):
+    """Nome para busca: sem acentos, minúsculo e só letras/números"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text.casefold() if char.isalnum())
+
+class ChannelLookup:
+    """Índice de um servidor para achar o canal digitado nos comandos.
+    
+    `keys` é uma lista ordenada de (chave, youtube_id), com o ID em
+    minúsculas e o nome normalizado de cada canal; igualdade e prefixo saem
+    por busca binária. Sem nada por prefixo, cai para trecho no meio do
+    ID/nome e por fim para nomes parecidos (difflib)."""
+    MAX_CANDIDATES = 5
+    
+    def __init__(self):
+        self.keys = []
+        self.names = {}
+    
+    def add(self, config):
+        self.names[config.youtube_id] = config.youtube_name
+        for key in self.config_keys(config):
+            bisect.insort(self.keys, (key, config.youtube_id))
+    
+    def discard(self, config):
+        self.names.pop(config.youtube_id, None)
+        for key in self.config_keys(config):
+            index = bisect.bisect_left(self.keys, (key, config.youtube_id))
+            if index < len(self.keys) and self.keys[index] == (key, config.youtube_id):
+                del self.keys[index]
+    
+    @staticmethod
+    def config_keys(config):
+        youtube_id = (config.youtube_id or '').lower()
+        # '@handle' também vale sem o '@'
+        keys = {youtube_id, youtube_id.lstrip('@'), normalize_name(config.youtube_name)}
+        keys.discard('')
+        return keys
+    
+    def prefixed(self, prefix, exact=False):
+        """youtube_ids com alguma chave começando por `prefix` (ou igual, se `exact`),
+        a chave mais curta primeiro"""
+        start = bisect.bisect_left(self.keys, (prefix,))
+        found = {}
+        # islice percorre a lista a partir de `start` sem copiar o resto dela
+        for key, youtube_id in itertools.islice(self.keys, start, None):
+            if not key.startswith(prefix) or (exact and key != prefix):
+                break
+            found[youtube_id] = min(len(key), found.get(youtube_id, len(key)))
+        return sorted(found, key=lambda youtube_id: (found[youtube_id], self.names[youtube_id]))
+    
+    def find(self, identifier):
+        """(youtube_id, candidatos): um canal, ou None e os candidatos em ordem"""
+        queries = {identifier.strip().lower(), normalize_name(identifier)}
+        queries.discard('')
+        if not queries:
+            return None, []
+        
+        # 1. ID ou nome exato; 2. prefixo de ID ou nome
+        for exact in (True, False):
+            matches = []
+            for query in queries:
+                matches += [youtube_id for youtube_id in self.prefixed(query, exact)
+                            if youtube_id not in matches]
+            if len(matches) == 1:
+                return matches[0], []
+            if matches:
+                return None, matches[:self.MAX_CANDIDATES]
+        
+        # 3. Trecho no meio do ID/nome (o comportamento antigo), mais parecidos primeiro
+        contains = {youtube_id for key, youtube_id in self.keys
+                    if any(query in key for query in queries)}
+        if len(contains) == 1:
+            return contains.pop(), []
+        
+        def similarity(youtube_id):
+            name = normalize_name(self.names[youtube_id])
+            return max(difflib.SequenceMatcher(None, query, name).ratio() for query in queries)
+        
+        if contains:
+            return None, sorted(contains, key=similarity, reverse=True)[:self.MAX_CANDIDATES]
+        
+        # 4. Nada bate: sugere os nomes parecidos, sem escolher por conta própria
+        close = [youtube_id for youtube_id in self.names if similarity(youtube_id) >= 0.6]
+        return None, sorted(close, key=similarity, reverse=True)[:self.MAX_CANDIDATES]
+
+class SubscriptionRegistry:
+    """Inscrições ativas em memória, indexadas por servidor e por canal do YouTube.
+    
+    `by_guild` é {server_id: {youtube_id: ChannelConfig}} e `by_channel` é
+    {youtube_id: {server_id: ChannelConfig}}, com os mesmos objetos nos dois;
+    `lookup` tem o ChannelLookup de cada servidor para os comandos.
+    Carregado uma vez na inicialização e mantido em dia pelas escritas do
+    AsyncYouTubeDB, então comandos e monitor não leem o banco."""
+    def __init__(self):
+        self.by_guild = {}
+        self.by_channel = {}
+        self.lookup = {}
+    
+    def load(self, rows):
+        self.by_guild.clear()
+        self.by_channel.clear()
+        self.lookup.clear()
+        for row in rows:
+            self.put(row)
+    
+    def put(self, row):
+        lookup = self.lookup.setdefault(row.server_id, ChannelLookup())
+        previous = self.by_guild.get(row.server_id, {}).get(row.youtube_id)
+        if previous is not None:
+            lookup.discard(previous)
+        lookup.add(row)
+        self.by_guild.setdefault(row.server_id, {})[row.youtube_id] = row
+        self.by_channel.setdefault(row.youtube_id, {})[row.server_id] = row
+    
+    def get(self, server_id, youtube_id):
+        return self.by_guild.get(str(server_id), {}).get(youtube_id)
+    
+    def update(self, server_id, youtube_id, **fields):
+        """Troca campos da inscrição, como um UPDATE ... WHERE is_active = 1"""
+        row = self.get(server_id, youtube_id)
+        if row is None:
+            return
+        for name, value in fields.items():
+            setattr(row, name, value)
+    
+    def remove(self, server_id, youtube_id=None):
+        server_id = str(server_id)
+        guild = self.by_guild.get(server_id, {})
+        youtube_ids = [youtube_id] if youtube_id else list(guild)
+        lookup = self.lookup.get(server_id)
+        for key in youtube_ids:
+            row = guild.pop(key, None)
+            if row is not None and lookup:
+                lookup.discard(row)
+            channel = self.by_channel.get(key, {})
+            channel.pop(server_id, None)
+            if not channel:
+                self.by_channel.pop(key, None)
+        if not guild:
+            self.by_guild.pop(server_id, None)
+            self.lookup.pop(server_id, None)
+    
+    def find(self, server_id, identifier):
+        """Canal do servidor pelo ID/nome digitado: (config, candidatos).
+        
+        (config, []) achou um só; (None, [configs]) é ambíguo ou são
+        sugestões; (None, []) não achou nada."""
+        server_id = str(server_id)
+        lookup = self.lookup.get(server_id)
+        if not lookup:
+            return None, []
+        youtube_id, candidates = lookup.find(identifier)
+        guild = self.by_guild[server_id]
+        if youtube_id:
+            return guild[youtube_id], []
+        return None, [guild[candidate] for candidate in candidates]
+    
+    def guild_configs(self, server_id):
+        """Inscrições do servidor, mais novas primeiro (igual ao get_config)"""
+        rows = self.by_guild.get(str(server_id), {}).values()
+        return sorted(rows, key=lambda row: row.created or '', reverse=True)
+    
+    def all_configs(self):
+        """Todas as inscrições, por servidor e depois mais novas primeiro"""
+        return [row for server_id in sorted(self.by_guild)
+                for row in self.guild_configs(server_id)]
+
+class SeenVideos:
+    """Últimos vídeos vistos de cada canal, para achar os novos sem ler o histórico.
+    
+    Cada canal tem um deque limitado (ordem de chegada, o mais antigo sai
+    primeiro) e um set com os mesmos IDs para consulta O(1)."""
+    def __init__(self, size):
+        self.size = size
+        self.channels = {}
+    
+    def load(self, rows):
+        self.channels.clear()
+        for youtube_id, video_id in rows:
+            self.add(youtube_id, [video_id])
+    
+    def known(self, youtube_id):
+        """O canal já teve vídeos vistos (senão não dá para dizer o que é novo)"""
+        return youtube_id in self.channels
+    
+    def unseen(self, youtube_id, videos):
+        """Vídeos (dicts) ainda não vistos, na ordem da lista"""
+        seen = self.channels[youtube_id][1] if youtube_id in self.channels else set()
+        found = set()
+        fresh = []
+        for video in videos:
+            if video['id'] not in seen and video['id'] not in found:
+                found.add(video['id'])
+                fresh.append(video)
+        return fresh
+    
+    def add(self, youtube_id, video_ids):
+        """Marca como vistos (na ordem dada); devolve (adicionados, removidos do fim)"""
+        order, seen = self.channels.setdefault(youtube_id, (deque(), set()))
+        added, evicted = [], []
+        for video_id in video_ids:
+            if video_id in seen:
+                continue
+            if len(order) >= self.size:
+                oldest = order.popleft()
+                seen.discard(oldest)
+                evicted.append(oldest)
+            order.append(video_id)
+            seen.add(video_id)
+            added.append(video_id)
+        return added, evicted
+    
+    def forget(self, youtube_ids):
+        for youtube_id in [k for k in self.channels if k not in youtube_ids]:
+            del self.channels[youtube_id]
+
+class AsyncYouTubeDB:
+    """Fachada assíncrona do YouTubeDB: todo acesso ao SQLite roda numa thread só.
+    
+    Cada método do YouTubeDB vira uma corrotina com o mesmo nome
+    (`await db.get_config(...)`). As chamadas vão para um executor de uma
+    thread, que as executa na ordem em que foram feitas, então leituras e
+    escritas continuam em sequência e o event loop não para esperando o
+    disco. A conexão é criada na própria thread do banco.
+    
+    As inscrições são lidas do SubscriptionRegistry, sem passar pelo banco;
+    save_config, update_setting, delete_config e as atualizações do monitor
+    gravam no banco e no registro ao mesmo tempo."""
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        self.db = self.executor.submit(YouTubeDB).result()
+        self.registry = SubscriptionRegistry()
+        self.registry.load(self.executor.submit(self.db.get_all_configs).result())
+        self.seen = SeenVideos(SEEN_VIDEOS_MAX)
+        self.seen.load(self.executor.submit(self.db.get_seen_videos).result())
+        self.webhooks = self.executor.submit(self.db.get_webhooks).result()
+        self.aliases = self.executor.submit(self.db.get_aliases).result()
+    
+    async def run(self, name, *args, **kwargs):
+        """Executa YouTubeDB.<name>(...) na thread do banco"""
+        method = functools.partial(getattr(self.db, name), *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, method)
+    
+    def __getattr__(self, name):
+        getattr(self.db, name)  # AttributeError para nomes que não existem
+        
+        async def call(*args, **kwargs):
+            return await self.run(name, *args, **kwargs)
+        
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+    
+    async def close(self):
+        """Grava a fila, fecha a conexão e encerra a thread do banco"""
+        await self.run('close')
+        self.executor.shutdown(wait=True)
+    
+    # ========== LEITURAS (REGISTRO) ==========
+    async def get_config(self, server_id, youtube_id=None):
+        if youtube_id:
+            row = self.registry.get(server_id, youtube_id)
+            return [row] if row else []
+        return self.registry.guild_configs(server_id)
+    
+    async def get_all_configs(self):
+        return self.registry.all_configs()
+    
+    async def get_active_configs(self):
+        return [row for row in self.registry.all_configs() 
+                if row.notify_videos or row.notify_lives or row.notify_scheduled]
+    
+    async def set_webhook(self, channel_id, webhook_id, token):
+        self.webhooks[channel_id] = (webhook_id, token)
+        await self.run('set_webhook', channel_id, webhook_id, token)
+    
+    async def delete_webhook(self, channel_id):
+        self.webhooks.pop(channel_id, None)
+        await self.run('delete_webhook', channel_id)
+    
+    def canonical_url(self, url):
+        """Endereço /channel/UC... da URL, se o apelido já foi resolvido (senão a própria URL)"""
+        youtube_id = self.aliases.get(channel_key(url))
+        return CHANNEL_URL.format(youtube_id) if youtube_id else url
+    
+    async def save_alias(self, url, youtube_id):
+        alias = channel_key(url)
+        if alias == f'channel/{youtube_id}':
+            return
+        self.aliases[alias] = youtube_id
+        await self.run('save_alias', alias, youtube_id)
+    
+    async def canonicalize_channel(self, old_id, youtube_id):
+        counts = await self.run('canonicalize_channel', old_id, youtube_id)
+        # Raro (uma vez por canal): relê inscrições e vistos em vez de remendar os índices
+        self.registry.load(await self.run('get_all_configs'))
+        self.seen.load(await self.run('get_seen_videos'))
+        return counts
+    
+    async def find_config(self, server_id, identifier):
+        return self.registry.find(server_id, identifier)
+    
+    async def mark_seen(self, youtube_id, videos):
+        """Marca os vídeos (lista do mais novo para o mais antigo) como vistos no canal"""
+        added, evicted = self.seen.add(youtube_id, [video['id'] for video in reversed(videos)])
+        if added or evicted:
+            await self.run('save_seen_videos', youtube_id, added, evicted)
+    
+    async def prune_history(self, keep_since=None):
+        counts = await self.run('prune_history', keep_since)
+        self.seen.forget(self.registry.by_channel)
+        return counts
+    
+    async def get_server_configs_count(self, server_id):
+        return len(self.registry.by_guild.get(str(server_id), {}))
+    
+    # ========== ESCRITAS (BANCO + REGISTRO) ==========
+    async def save_config(self, server_id, channel_id, youtube_url, youtube_name, youtube_id, user_id):
+        saved = await self.run('save_config', server_id, channel_id, youtube_url,
+                               youtube_name, youtube_id, user_id)
+        # Relê a linha gravada para ter id, padrões e created do banco
+        for row in await self.run('get_config', server_id, youtube_id):
+            self.registry.put(row)
+        return saved
+    
+    async def update_setting(self, server_id, youtube_id, setting, value):
+        self.registry.update(server_id, youtube_id, **{setting: value,
+                                                        'last_check': datetime.now().isoformat()})
+        await self.run('update_setting', server_id, youtube_id, setting, value)
+    
+    async def delete_config(self, server_id, youtube_id=None):
+        deleted = await self.run('delete_config', server_id, youtube_id)
+        self.registry.remove(server_id, youtube_id)
+        return deleted
+    
+    async def update_video(self, server_id, youtube_id, video_id, title, publish_time):
+        self.registry.update(server_id, youtube_id, last_video=video_id, last_video_title=title,
+                             last_video_time=publish_time, last_check=datetime.now().isoformat())
+        await self.run('update_video', server_id, youtube_id, video_id, title, publish_time)
+    
+    async def update_live(self, server_id, youtube_id, video_id, title):
+        self.registry.update(server_id, youtube_id, last_live=video_id, last_live_title=title,
+                             last_check=datetime.now().isoformat())
+        await self.run('update_live', server_id, youtube_id, video_id, title)
+    
+    async def update_scheduled(self, server_id, youtube_id, video_id, title, scheduled_time):
+        self.registry.update(server_id, youtube_id, scheduled_live=video_id,
+                             scheduled_live_time=scheduled_time, last_check=datetime.now().isoformat())
+        await self.run('update_scheduled', server_id, youtube_id, video_id, title, scheduled_time)
+
 # ========== BOT ==========
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
-db = YouTubeDB()
+def create_http_session():
+    """Cria a sessão HTTP do bot: pool de conexões keep-alive com cache de DNS"""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE,
+        ttl_dns_cache=HTTP_DNS_TTL,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=YOUTUBE_HEADERS,
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+    )
+
+def create_webhook_session():
+    """Sessão dos webhooks do Discord: sem os cabeçalhos de navegador da sessão
+    do YouTube e com o tempo limite de uma chamada à API do Discord"""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(keepalive_timeout=HTTP_KEEPALIVE, ttl_dns_cache=HTTP_DNS_TTL),
+        timeout=aiohttp.ClientTimeout(total=WEBHOOK_TIMEOUT),
+    )
+
+def create_parse_executor():
+    """Pool de processos que analisa o HTML fora do event loop.
+    
+    Os processos nascem por fork (pedido explicitamente: o padrão é
+    forkserver no Linux com Python 3.14 e spawn no macOS), já com a thread
+    do SQLite e as do discord.py rodando. Isso é seguro aqui porque o filho
+    só executa parse_channel_page (json/re puros, sem banco, rede nem locks
+    herdados). forkserver/spawn reimportariam o bot.py em cada processo, e
+    ele abre o banco e monta o bot no nível do módulo; sem fork (Windows)
+    não há pool (ver FORK_AVAILABLE)."""
+    return ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('fork'))
+
+class YouTubeBot(commands.Bot):
+    """Bot com uma sessão HTTP para o YouTube (e outra para os webhooks do
+    Discord), criadas no início e fechadas no encerramento"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_session = None
+        self.webhook_session = None
+        self.parse_executor = None
+        self.websub = None
+        self.websub_sync = None
+    
+    async def setup_hook(self):
+        self.http_session = create_http_session()
+        print("✅ Sessão HTTP compartilhada pronta")
+        
+        if PARSE_WORKERS > 0 and FORK_AVAILABLE:
+            self.parse_executor = create_parse_executor()
+            # Sobe os processos agora, e não no meio da primeira verificação
+            await asyncio.get_running_loop().run_in_executor(self.parse_executor, int)
+            print(f"✅ Pool de análise pronto ({PARSE_WORKERS} processos)")
+        elif PARSE_WORKERS > 0:
+            print("⚠️ Sistema sem fork: HTML analisado no próprio event loop")
+        
+        if WEBSUB_CALLBACK_URL:
+            from websub import WebSubReceiver
+            self.websub = WebSubReceiver(self.get_http_session, WEBSUB_CALLBACK_URL,
+                                         on_websub_notification, hub_url=WEBSUB_HUB,
+                                         lease=WEBSUB_LEASE, secret=WEBSUB_SECRET,
+                                         host=WEBSUB_HOST, port=WEBSUB_PORT)
+            await self.websub.start()
+    
+    def get_http_session(self):
+        """Retorna a sessão compartilhada (recria se ainda não existir ou foi fechada)"""
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = create_http_session()
+        return self.http_session
+    
+    def get_webhook_session(self):
+        """Sessão dos webhooks (criada no primeiro uso)"""
+        if self.webhook_session is None or self.webhook_session.closed:
+            self.webhook_session = create_webhook_session()
+        return self.webhook_session
+    
+    async def close(self):
+        multi_channel_monitor.cancel()
+        history_maintenance.cancel()
+        alias_maintenance.cancel()
+        # Notificações ainda na fila saem antes de desconectar
+        await dispatcher.close()
+        if self.websub:
+            await self.websub.stop()
+        await super().close()
+        await db.close()
+        print("✅ Banco de dados gravado e fechado")
+        if self.http_session and not self.http_session.closed:
+            await self.http_session.close()
+            print("✅ Sessão HTTP encerrada")
+        if self.webhook_session and not self.webhook_session.closed:
+            await self.webhook_session.close()
+        if self.parse_executor:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+            self.parse_executor = None
+
+bot = YouTubeBot(command_prefix='!', intents=intents, help_command=None)
+db = AsyncYouTubeDB()
 
 # ========== FUNÇÕES YOUTUBE ==========
-async def fetch_youtube_data(url):
-    """Busca dados do YouTube"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-    }
+NOT_MODIFIED = object()  # resposta 304 de uma requisição condicional
+
+class PageCache:
+    """Evita reanalisar páginas e feeds que não mudaram entre verificações.
+    
+    Guarda por URL os validadores HTTP (ETag / Last-Modified) e o último
+    resultado analisado, e por canal o estado da última verificação já
+    notificada (impressão digital da página + vídeos do feed + estado dos
+    inscritos). Os contadores mostram quanto trabalho foi poupado."""
+    def __init__(self):
+        self.validators = {}
+        self.results = {}
+        self.states = {}
+        self.unchanged = 0
+        self.changed = 0
+        self.not_modified = 0
+        self.early_stops = 0
+        self.drained = 0
+    
+    def request_headers(self, url):
+        """Cabeçalhos condicionais (só se ainda houver resultado guardado para a URL)"""
+        if url in self.results:
+            return self.validators.get(url)
+        return None
+    
+    def save_validators(self, url, headers):
+        validators = {}
+        if 'ETag' in headers:
+            validators['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        if validators:
+            self.validators[url] = validators
+        else:
+            self.validators.pop(url, None)
+    
+    def prune(self, youtube_ids, urls):
+        """Esquece canais e URLs que não são mais monitorados"""
+        for key in [k for k in self.states if k not in youtube_ids]:
+            del self.states[key]
+        for cache in (self.results, self.validators):
+            for key in [k for k in cache if k not in urls]:
+                del cache[key]
+    
+    def stats(self):
+        total = self.unchanged + self.changed
+        ratio = self.unchanged / total * 100 if total else 0
+        return (f"sem mudança {self.unchanged}/{total} ({ratio:.0f}%) • "
+                f"304: {self.not_modified} • downloads interrompidos: {self.early_stops} • "
+                f"esvaziados em segundo plano: {self.drained}")
+
+page_cache = PageCache()
+
+# Último resultado de cada canal por alguns segundos; buscas simultâneas viram uma só
+snapshots = SnapshotCache(SNAPSHOT_TTL, SNAPSHOT_MAX_ENTRIES, SNAPSHOT_MAX_BYTES)
+
+# Vídeos recebidos por WebSub e ainda não vistos pelo monitor: {youtube_id: [vídeo, ...]}
+pushed_videos = {}
+
+# Notificações saem por aqui: o monitor não espera o Discord
+dispatcher = NotificationDispatcher(DISPATCH_RATE, DISPATCH_BURST, DISPATCH_CONCURRENCY)
+
+class WebhookTarget:
+    """Destino do dispatcher que entrega pelo webhook do canal.
+    
+    O webhook usa a sessão própria dos webhooks e tem limites próprios no
+    Discord, separados dos do bot, então os alertas não disputam com as
+    respostas dos comandos. Se o webhook foi apagado ou a permissão caiu,
+    esquece o webhook e entrega por channel.send."""
+    def __init__(self, channel, webhook_id, token):
+        self.channel = channel
+        self.id = channel.id
+        self.webhook_id = webhook_id
+        self.token = token
     
+    async def send(self, content=None, embeds=()):
+        webhook = discord.Webhook.partial(self.webhook_id, self.token, session=bot.get_webhook_session())
+        try:
+            if bot.user:
+                await webhook.send(content, embeds=embeds, username=bot.user.name,
+                                   avatar_url=bot.user.display_avatar.url)
+            else:
+                await webhook.send(content, embeds=embeds)
+            return
+        except discord.HTTPException as e:
+            if e.status not in (401, 403, 404):
+                raise
+            print(f"⚠️ Webhook do canal {self.id} indisponível ({e.status}); voltando para o bot")
+            await db.delete_webhook(self.id)
+        await self.channel.send(content, embeds=embeds)
+
+def delivery_target(channel):
+    """Para onde o dispatcher entrega: o webhook do canal, se ligado, ou o próprio canal"""
+    saved = db.webhooks.get(channel.id)
+    if saved:
+        return WebhookTarget(channel, *saved)
+    return channel
+
+def unread_tail(response):
+    """Bytes do corpo ainda não recebidos, ou None se não dá para saber.
+    
+    Só sem compressão: com gzip o Content-Length conta bytes comprimidos e
+    o aiohttp não diz quantos deles já chegaram."""
+    if response.content_length is None or response.headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+    return response.content_length - response.content.total_bytes
+
+draining = set()
+
+async def drain_response(response):
+    """Lê e descarta o resto do corpo para a conexão keep-alive voltar ao pool"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    return await response.text()
+        async for _ in response.content.iter_chunked(PAGE_CHUNK):
+            pass
+    except Exception:
+        response.close()
+    finally:
+        response.release()
+
+def drain_later(response):
+    """Esvazia a resposta numa task, sem segurar quem já tem o que precisava"""
+    task = asyncio.create_task(drain_response(response))
+    draining.add(task)
+    task.add_done_callback(draining.discard)
+
+async def fetch_youtube_data(url, conditional=False):
+    """Busca dados do YouTube (usa a sessão HTTP compartilhada do bot).
+    
+    A página é lida aos pedaços e só guardada até o <script> do ytInitialData
+    fechar (ou até PAGE_MAX_BYTES); o resto não muda a análise. Assim que o
+    ytInitialData fecha a página já é devolvida: o resto do corpo é lido e
+    descartado numa task (drain_later), para a conexão voltar ao pool, a
+    menos que o Content-Length mostre uma cauda grande (ver unread_tail) e
+    valha mais fechar a conexão.
+    Com `conditional`, envia os validadores guardados e devolve NOT_MODIFIED
+    se o servidor responder 304."""
+    response = None
+    try:
+        session = bot.get_http_session()
+        headers = page_cache.request_headers(url) if conditional else None
+        response = await session.get(url, headers=headers)
+        if response.status == 304:
+            page_cache.not_modified += 1
+            return NOT_MODIFIED
+        if response.status == 200:
+            page_cache.save_validators(url, response.headers)
+            encoding = response.charset or 'utf-8'
+            reader = ChannelPageReader(PAGE_MAX_BYTES)
+            async for chunk in response.content.iter_chunked(PAGE_CHUNK):
+                reader.feed(chunk)
+                if reader.truncated:
+                    print(f"⚠️ Página de {url} passou de {PAGE_MAX_BYTES // 1024} KB; lida só até o limite")
+                    break
+                if reader.done:
+                    if (unread_tail(response) or 0) >= PAGE_EARLY_STOP_TAIL:
+                        page_cache.early_stops += 1
+                    elif not response.content.at_eof():
+                        page_cache.drained += 1
+                        drain_later(response)
+                        response = None
+                    break
+            return reader.text(encoding)
     except Exception as e:
         print(f"Erro ao buscar {url}: {e}")
+    finally:
+        # Corpo lido até o fim devolve a conexão ao pool; lido pela metade, fecha
+        if response is not None:
+            response.release()
     
     return None
 
+async def fetch_channel_feed(channel_id):
+    """Vídeos recentes pelo feed Atom do canal, lido aos pedaços.
+    
+    Para de analisar assim que tem MAX_RECENT_VIDEOS entradas, mas lê o feed
+    (dezenas de KB) até o fim: resposta lida pela metade fecha a conexão em
+    vez de devolvê-la ao pool. Devolve o dict de VideoFeedParser.result()
+    (o guardado, se o feed responder 304) ou None se o feed falhar."""
+    url = FEED_URL.format(channel_id)
+    reader = VideoFeedParser()
+    try:
+        session = bot.get_http_session()
+        async with session.get(url, headers=page_cache.request_headers(url)) as response:
+            if response.status == 304:
+                page_cache.not_modified += 1
+                return page_cache.results[url]
+            if response.status != 200:
+                return None
+            page_cache.save_validators(url, response.headers)
+            async for chunk in response.content.iter_chunked(16384):
+                reader.feed(chunk)
+    except Exception as e:
+        print(f"Erro ao ler feed de {channel_id}: {e}")
+        return None
+    
+    page_cache.results[url] = reader.result()
+    return page_cache.results[url]
+
+async def parse_in_pool(html, url):
+    """Analisa o HTML no pool de processos e devolve o dict de informações"""
+    if not bot.parse_executor:
+        return parse_channel_page(html, url)
+    
+    loop = asyncio.get_running_loop()
+    executor = bot.parse_executor
+    try:
+        return await loop.run_in_executor(executor, parse_channel_page, html, url)
+    except BrokenProcessPool:
+        # Um processo morreu (ex.: falta de memória): recria o pool. Todas as
+        # análises em andamento recebem o erro juntas; só a primeira recria,
+        # as outras já encontram o pool novo e não podem derrubá-lo
+        if bot.parse_executor is executor:
+            print("⚠️ Pool de análise quebrado, recriando...")
+            executor.shutdown(wait=False, cancel_futures=True)
+            bot.parse_executor = create_parse_executor()
+        return await loop.run_in_executor(bot.parse_executor, parse_channel_page, html, url)
+
 async def extract_youtube_info(url):
-    """Extrai informações do canal - VERSÃO 2024 OTIMIZADA"""
+    """Extrai informações do canal: do cache se forem recentes, senão busca e analisa.
+    
+    Pedidos simultâneos do mesmo canal compartilham uma busca só."""
+    info = await snapshots.get(channel_key(url), functools.partial(fetch_youtube_info, url))
+    return dict(info) if info else None
+
+async def fetch_youtube_info(url):
+    """Busca o HTML aqui e analisa no pool de processos"""
     html = await fetch_youtube_data(url)
     if not html:
         print(f"❌ Não foi possível obter HTML de {url}")
         return None
     
-    info = {
-        'channel_name': 'Canal do YouTube',
-        'channel_id': None,
-        'is_live': False,
-        'live_info': None,
-        'scheduled_live': None,
-        'latest_video': None,
-        'recent_videos': [],
-        'channel_url': url
-    }
-    
-    try:
-        print(f"🔍 Analisando HTML de {url}...")
-        
-        # ========== MÉTODO 1: Busca por JSON ytInitialData ==========
-        # O YouTube armazena dados em um JSON gigante chamado ytInitialData
-        initial_data_match = re.search(r'var ytInitialData\s*=\s*({.*?});', html, re.DOTALL)
-        
-        if initial_data_match:
-            try:
-                print("📊 Tentando extrair via JSON ytInitialData...")
-                data = json.loads(initial_data_match.group(1))
-                
-                # Função para buscar informações recursivamente no JSON
-                def search_in_json(obj, path=""):
-                    if isinstance(obj, dict):
-                        # Procura por nome do canal
-                        if 'title' in obj:
-                            title_data = obj['title']
-                            if 'runs' in title_data and title_data['runs']:
-                                runs = title_data['runs']
-                                for run in runs:
-                                    if 'text' in run:
-                                        info['channel_name'] = run['text']
-                                        break
-                            elif 'simpleText' in title_data:
-                                info['channel_name'] = title_data['simpleText']
-                        
-                        # Procura por ID do canal
-                        if 'channelId' in obj:
-                            info['channel_id'] = obj['channelId']
-                        elif 'browseId' in obj and 'UC' in str(obj['browseId']):
-                            info['channel_id'] = obj['browseId']
-                        
-                        # Procura por live
-                        if obj.get('isLive') is True or obj.get('style') == 'LIVE':
-                            info['is_live'] = True
-                            if 'videoId' in obj:
-                                video_id = obj['videoId']
-                                title = obj.get('title', {})
-                                title_text = ""
-                                
-                                if 'runs' in title and title['runs']:
-                                    title_text = title['runs'][0].get('text', '')
-                                elif 'simpleText' in title:
-                                    title_text = title['simpleText']
-                                
-                                info['live_info'] = {
-                                    'id': video_id,
-                                    'title': title_text,
-                                    'url': f"https://youtu.be/{video_id}",
-                                    'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                                    'type': 'live'
-                                }
-                        
-                        # Procura por vídeos
-                        if 'videoId' in obj and 'title' in obj:
-                            video_id = obj['videoId']
-                            title_data = obj['title']
-                            title_text = ""
-                            
-                            if 'runs' in title_data and title_data['runs']:
-                                title_text = title_data['runs'][0].get('text', '')
-                            elif 'simpleText' in title_data:
-                                title_text = title_data['simpleText']
-                            
-                            # É o primeiro vídeo encontrado?
-                            if not info['latest_video']:
-                                info['latest_video'] = {
-                                    'id': video_id,
-                                    'title': title_text,
-                                    'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                                    'url': f"https://youtu.be/{video_id}",
-                                    'publish_time': 'Recentemente',
-                                    'type': 'video'
-                                }
-                            
-                            # Adiciona à lista de vídeos recentes
-                            info['recent_videos'].append({
-                                'id': video_id,
-                                'title': title_text,
-                                'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                                'url': f"https://youtu.be/{video_id}",
-                                'publish_time': 'Recentemente',
-                                'type': 'video'
-                            })
-                        
-                        # Busca recursivamente
-                        for key, value in obj.items():
-                            if key not in ['thumbnail', 'avatar', 'image']:  # Pula grandes objetos
-                                search_in_json(value, f"{path}.{key}")
-                    
-                    elif isinstance(obj, list):
-                        for item in obj:
-                            search_in_json(item, path)
-                
-                # Executa a busca
-                search_in_json(data)
-                print(f"✅ JSON analisado: {info['channel_name']} (ID: {info['channel_id']})")
-                
-            except json.JSONDecodeError as e:
-                print(f"⚠️ Erro ao decodificar JSON: {e}")
-            except Exception as e:
-                print(f"⚠️ Erro no método JSON: {e}")
-        
-        # ========== MÉTODO 2: Regex modernas para 2024 ==========
-        # Se o JSON não funcionou, usa regex atualizadas
-        
-        # 1. Extrai nome do canal (múltiplas tentativas)
-        name_patterns = [
-            r'<meta property="og:title" content="([^"]+)"',
-            r'<meta name="title" content="([^"]+)"',
-            r'<title>([^<]+) - YouTube</title>',
-            r'"author":"([^"]+)"',
-            r'"channelName":"([^"]+)"',
-            r'"title":"([^"]+)"[^}]*"canonicalBaseUrl":"/@[^"]+"',
-            r'"header":"c4TabbedHeaderRenderer"[^}]+"title":"([^"]+)"',
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
-            if match:
-                name = match.group(1).strip()
-                if name and len(name) > 2 and 'YouTube' not in name:
-                    info['channel_name'] = name.replace(' - YouTube', '').replace('\\"', '"')
-                    print(f"✅ Nome encontrado via regex: {info['channel_name']}")
-                    break
-        
-        # 2. Extrai ID do canal (múltiplas tentativas)
-        id_patterns = [
-            r'"channelId":"([^"]+)"',
-            r'"browseId":"([^"]+)"',
-            r'<link rel="canonical" href="https://www\.youtube\.com/channel/([^"]+)"',
-            r'"externalId":"([^"]+)"',
-            r'data-channel-external-id="([^"]+)"',
-        ]
-        
-        for pattern in id_patterns:
-            match = re.search(pattern, html)
-            if match:
-                channel_id = match.group(1)
-                if channel_id and ('UC' in channel_id or channel_id.startswith('@')):
-                    info['channel_id'] = channel_id
-                    print(f"✅ ID encontrado via regex: {info['channel_id']}")
-                    break
-        
-        # Se não encontrou ID ainda, tenta extrair da URL
-        if not info['channel_id']:
-            if '/channel/' in url:
-                match = re.search(r'/channel/([^/?]+)', url)
-                if match:
-                    info['channel_id'] = match.group(1)
-            elif '/@' in url:
-                match = re.search(r'/@([^/?]+)', url)
-                if match:
-                    info['channel_id'] = '@' + match.group(1)
-            elif '/c/' in url:
-                match = re.search(r'/c/([^/?]+)', url)
-                if match:
-                    info['channel_id'] = 'c_' + match.group(1)
-        
-        # 3. Verifica se está em live (padrões modernos)
-        live_patterns = [
-            r'"isLive":true',
-            r'"isLiveBroadcast":true',
-            r'"style":"LIVE"',
-            r'"badges":\[[^\]]*"live"[^\]]*\]',
-            r'<span[^>]*aria-label="[^"]*AO VIVO[^"]*"',
-            r'<span[^>]*class="[^"]*badge-style-type-live[^"]*"',
-            r'<link[^>]*content="https://www\.youtube\.com/watch\?v=[^"]*"[^>]*type="application/x\+youtube-live-message"',
-        ]
-        
-        for pattern in live_patterns:
-            if re.search(pattern, html, re.IGNORECASE):
-                info['is_live'] = True
-                print("🎬 Live detectada!")
-                break
-        
-        # 4. Extrai informações da live (se houver)
-        if info['is_live']:
-            # Padrões modernos para live
-            live_info_patterns = [
-                r'"videoId":"([^"]+)"[^}]*"title":\{"runs":\[\{"text":"([^"]+)"',
-                r'"videoId":"([^"]+)"[^}]*"title":\{"simpleText":"([^"]+)"',
-                r'watch\?v=([^"&]+)[^>]*title="([^"]+)"[^>]*aria-label="[^"]*AO VIVO',
-                r'<meta property="og:title" content="([^"]+)[^"]*AO VIVO[^"]*"[^>]*>\s*<meta property="og:url" content="[^"]*v=([^"&]+)"',
-            ]
-            
-            for pattern in live_info_patterns:
-                match = re.search(pattern, html, re.IGNORECASE)
-                if match:
-                    video_id = match.group(1)
-                    title = match.group(2).replace('\\"', '"')
-                    info['live_info'] = {
-                        'id': video_id,
-                        'title': title,
-                        'url': f"https://youtu.be/{video_id}",
-                        'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                        'type': 'live'
-                    }
-                    print(f"✅ Informações da live: {title}")
-                    break
-        
-        # 5. Extrai vídeos recentes
-        video_patterns = [
-            r'"videoId":"([^"]+)"[^}]*"title":\{"runs":\[\{"text":"([^"]+)"[^}]*"thumbnail":\{"thumbnails":\[\{"url":"([^"]+)"',
-            r'"videoId":"([^"]+)"[^}]*"title":\{"simpleText":"([^"]+)"[^}]*"thumbnail":\{"thumbnails":\[\{"url":"([^"]+)"',
-            r'<a[^>]*href="/watch\?v=([^"&]+)"[^>]*title="([^"]+)"[^>]*><img[^>]*src="([^"]+)"',
-            r'ytInitialData["\'][^}]+"videoId":"([^"]+)"[^}]+"title":\{[^}]+\}[^}]+"thumbnail":\{[^}]+\}[^}]+"publishedTimeText":\{[^}]+\}[^}]+"simpleText":"([^"]+)"',
-        ]
-        
-        for pattern in video_patterns:
-            matches = re.findall(pattern, html, re.IGNORECASE)
-            if matches:
-                print(f"📹 Encontrados {len(matches)} vídeos via regex")
-                for i, match in enumerate(matches[:5]):  # Limita a 5 vídeos
-                    video_id = match[0]
-                    title = match[1].replace('\\"', '"') if len(match) > 1 else "Vídeo recente"
-                    thumbnail = match[2].replace('\\u0026', '&') if len(match) > 2 else f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
-                    
-                    video_info = {
-                        'id': video_id,
-                        'title': title[:100] + "..." if len(title) > 100 else title,
-                        'thumbnail': thumbnail,
-                        'url': f"https://youtu.be/{video_id}",
-                        'publish_time': match[3] if len(match) > 3 else 'Recentemente',
-                        'type': 'video'
-                    }
-                    
-                    if i == 0:  # Primeiro vídeo é o mais recente
-                        info['latest_video'] = video_info
-                    
-                    info['recent_videos'].append(video_info)
-                break
-        
-        # 6. Se não encontrou vídeos ainda, tenta padrão mais simples
-        if not info['latest_video']:
-            simple_video_pattern = r'watch\?v=([^"&]+)'
-            video_matches = re.findall(simple_video_pattern, html)
-            if video_matches:
-                video_id = video_matches[0]  # Primeiro vídeo encontrado
-                info['latest_video'] = {
-                    'id': video_id,
-                    'title': 'Vídeo recente',
-                    'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                    'url': f"https://youtu.be/{video_id}",
-                    'publish_time': 'Recentemente',
-                    'type': 'video'
-                }
-                print(f"✅ Vídeo encontrado via padrão simples: {video_id}")
-        
-        # ========== VALIDAÇÃO FINAL ==========
-        # Se não conseguiu ID do canal, cria um baseado no nome
-        if not info['channel_id']:
-            # Cria um ID fictício baseado no nome (para funcionar no banco)
-            clean_name = re.sub(r'[^a-zA-Z0-9]', '', info['channel_name'])
-            info['channel_id'] = f"custom_{clean_name[:20]}" if clean_name else f"custom_{hash(url) % 10000}"
-            print(f"⚠️ Usando ID customizado: {info['channel_id']}")
-        
-        print(f"✅ Análise concluída: {info['channel_name']}")
-        return info
-        
-    except Exception as e:
-        print(f"❌ Erro crítico ao processar {url}: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    return info
+    return await parse_in_pool(html, url)
 
 # ========== SISTEMA DE COMANDOS MULTI-CANAL ==========
 class YouTubeCommands(commands.Cog):
@@ -571,7 +1455,7 @@ class YouTubeCommands(commands.Cog):
             return
         
         # Pega TODOS os canais configurados neste servidor
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not youtube_url:
             if configs:
@@ -582,6 +1466,21 @@ class YouTubeCommands(commands.Cog):
         
         await self.process_configuration(ctx, youtube_url)
     
+    async def find_target(self, ctx, identifier, not_found):
+        """Canal do servidor pelo ID (ou começo dele) ou nome; avisa se não achar ou se for ambíguo"""
+        config, candidates = await db.find_config(ctx.guild.id, identifier)
+        if config:
+            return config
+        
+        if candidates:
+            options = "\n".join(f"• **{candidate.youtube_name}** - `{candidate.youtube_id}`"
+                                for candidate in candidates)
+            await ctx.send(f"🤔 **`{identifier}` pode ser:**\n{options}\n"
+                           f"Use o ID (ou o começo dele) para escolher.")
+        else:
+            await ctx.send(not_found)
+        return None
+    
     async def show_all_configs(self, ctx, configs):
         """Mostra TODOS os canais configurados no servidor"""
         embed = discord.Embed(
@@ -591,24 +1490,18 @@ class YouTubeCommands(commands.Cog):
         )
         
         for config in configs:
-            # Desempacota a configuração
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
             # Status das notificações
             notify_status = []
-            if notify_videos: notify_status.append("📹")
-            if notify_lives: notify_status.append("🎬")
-            if notify_scheduled: notify_status.append("📅")
+            if config.notify_videos: notify_status.append("📹")
+            if config.notify_lives: notify_status.append("🎬")
+            if config.notify_scheduled: notify_status.append("📅")
             
             embed.add_field(
-                name=f"**{youtube_name}**",
-                value=f"**ID:** `{youtube_id or 'N/A'}`\n"
+                name=f"**{config.youtube_name}**",
+                value=f"**ID:** `{config.youtube_id or 'N/A'}`\n"
                       f"**Notificar:** {' '.join(notify_status) if notify_status else '❌'}\n"
-                      f"**Configurado:** {created[:10]}\n"
-                      f"**Comandos:** `!yt_info {youtube_id or 'ID'}`",
+                      f"**Configurado:** {config.created[:10]}\n"
+                      f"**Comandos:** `!yt_info {config.youtube_id or 'ID'}`",
                 inline=True
             )
         
@@ -660,32 +1553,37 @@ class YouTubeCommands(commands.Cog):
             
             processing_msg = await ctx.send("🔍 **Analisando canal...**")
             
-            # Extrai informações
-            info = await extract_youtube_info(youtube_url)
+            # Extrai informações (pelo endereço /channel/UC... se o @handle já é conhecido)
+            info = await extract_youtube_info(db.canonical_url(youtube_url))
             
             if not info or not info['channel_id']:
                 await processing_msg.edit(content="❌ **Canal não encontrado.** Verifique o link.")
                 return
             
+            channel_url = info['channel_url']
+            if info['channel_id'].startswith('UC'):
+                await db.save_alias(youtube_url, info['channel_id'])
+                channel_url = CHANNEL_URL.format(info['channel_id'])
+            
             # Verifica se já está monitorando este canal neste servidor
-            existing_configs = db.get_config(ctx.guild.id, info['channel_id'])
+            existing_configs = await db.get_config(ctx.guild.id, info['channel_id'])
             
             if existing_configs:
                 await processing_msg.edit(content=f"✅ **{info['channel_name']} já está sendo monitorado neste servidor!**")
                 return
             
             # Salva configuração
-            db.save_config(
+            await db.save_config(
                 ctx.guild.id,
                 ctx.channel.id,
-                info['channel_url'],
+                channel_url,
                 info['channel_name'],
                 info['channel_id'],
                 ctx.author.id
             )
             
             # Conta quantos canais o servidor está monitorando agora
-            total_canais = db.get_server_configs_count(ctx.guild.id)
+            total_canais = await db.get_server_configs_count(ctx.guild.id)
             
             # Cria embed de sucesso
             embed = discord.Embed(
@@ -736,7 +1634,7 @@ class YouTubeCommands(commands.Cog):
     @commands.command(name='yt_info')
     async def show_channel_info(self, ctx, identifier=None):
         """📋 Mostra informações detalhadas de um canal"""
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not configs:
             await ctx.send("❌ **Nenhum canal configurado.** Use `!yt` primeiro.")
@@ -751,14 +1649,9 @@ class YouTubeCommands(commands.Cog):
             )
             
             for config in configs:
-                config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-                last_video, last_video_title, last_video_time, last_live, last_live_title, \
-                scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-                notify_scheduled, config_user, created, last_check, is_active = config
-                
                 embed.add_field(
-                    name=f"**{youtube_name}**",
-                    value=f"`!yt_info {youtube_id[:8]}...`",
+                    name=f"**{config.youtube_name}**",
+                    value=f"`!yt_info {config.youtube_id[:8]}...`",
                     inline=True
                 )
             
@@ -766,40 +1659,20 @@ class YouTubeCommands(commands.Cog):
             return
         
         # Procura o canal pelo ID ou nome
-        target_config = None
-        for config in configs:
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
-            if youtube_id and identifier in youtube_id:
-                target_config = config
-                break
-            elif identifier.lower() in youtube_name.lower():
-                target_config = config
-                break
-        
-        if not target_config:
-            await ctx.send("❌ **Canal não encontrado.** Use `!yt` para ver a lista.")
+        config = await self.find_target(ctx, identifier, "❌ **Canal não encontrado.** Use `!yt` para ver a lista.")
+        if not config:
             return
         
-        # Desempacota a configuração
-        config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-        last_video, last_video_title, last_video_time, last_live, last_live_title, \
-        scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-        notify_scheduled, config_user, created, last_check, is_active = target_config
-        
         processing_msg = await ctx.send("🔍 **Buscando informações atualizadas...**")
         
         try:
             # Busca informações atualizadas
-            info = await extract_youtube_info(youtube_url)
+            info = await extract_youtube_info(config.youtube_url)
             
             embed = discord.Embed(
-                title=f"📺 **{youtube_name}**",
-                description=f"**ID:** `{youtube_id}`\n"
-                          f"**URL:** [Acessar canal]({youtube_url})",
+                title=f"📺 **{config.youtube_name}**",
+                description=f"**ID:** `{config.youtube_id}`\n"
+                          f"**URL:** [Acessar canal]({config.youtube_url})",
                 color=0x7289DA
             )
             
@@ -827,9 +1700,9 @@ class YouTubeCommands(commands.Cog):
             
             # Configurações
             notify_status = []
-            if notify_videos: notify_status.append("✅ Vídeos")
-            if notify_lives: notify_status.append("✅ Lives")
-            if notify_scheduled: notify_status.append("✅ Programadas")
+            if config.notify_videos: notify_status.append("✅ Vídeos")
+            if config.notify_lives: notify_status.append("✅ Lives")
+            if config.notify_scheduled: notify_status.append("✅ Programadas")
             
             embed.add_field(
                 name="🔔 **Notificações**",
@@ -839,24 +1712,24 @@ class YouTubeCommands(commands.Cog):
             
             embed.add_field(
                 name="📅 **Configurado**",
-                value=f"**Por:** <@{config_user}>\n"
-                      f"**Em:** {created[:10]}",
+                value=f"**Por:** <@{config.config_user}>\n"
+                      f"**Em:** {config.created[:10]}",
                 inline=True
             )
             
             # Últimas atividades
-            if last_video:
+            if config.last_video:
                 embed.add_field(
                     name="📹 **Último Vídeo**",
-                    value=f"**{last_video_title[:50]}...**\n"
-                          f"⏰ {last_video_time}",
+                    value=f"**{config.last_video_title[:50]}...**\n"
+                          f"⏰ {config.last_video_time}",
                     inline=False
                 )
             
-            if last_live:
+            if config.last_live:
                 embed.add_field(
                     name="🎬 **Última Live**",
-                    value=f"**{last_live_title[:50]}...**" if last_live_title else "Detectada",
+                    value=f"**{config.last_live_title[:50]}...**" if config.last_live_title else "Detectada",
                     inline=False
                 )
             
@@ -883,10 +1756,10 @@ class YouTubeCommands(commands.Cog):
             embed.add_field(
                 name="🔧 **Comandos**",
                 value=f"```css\n"
-                      f"!yt_settings {youtube_id[:8]} videos on/off\n"
-                      f"!yt_settings {youtube_id[:8]} lives on/off\n"
-                      f"!yt_settings {youtube_id[:8]} scheduled on/off\n"
-                      f"!yt_remove {youtube_id[:8]}\n"
+                      f"!yt_settings {config.youtube_id[:8]} videos on/off\n"
+                      f"!yt_settings {config.youtube_id[:8]} lives on/off\n"
+                      f"!yt_settings {config.youtube_id[:8]} scheduled on/off\n"
+                      f"!yt_remove {config.youtube_id[:8]}\n"
                       f"```",
                 inline=False
             )
@@ -899,7 +1772,7 @@ class YouTubeCommands(commands.Cog):
     @commands.command(name='yt_all')
     async def show_all_channels(self, ctx):
         """📋 Mostra todos os canais configurados"""
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not configs:
             await ctx.send("❌ **Nenhum canal configurado.** Use `!yt` primeiro.")
@@ -910,7 +1783,7 @@ class YouTubeCommands(commands.Cog):
     @commands.command(name='yt_now')
     async def check_now(self, ctx, identifier=None):
         """⚡ Verifica todos os canais AGORA"""
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not configs:
             await ctx.send("❌ **Nenhum canal configurado.** Use `!yt` primeiro.")
@@ -924,96 +1797,112 @@ class YouTubeCommands(commands.Cog):
             await self.check_all_channels(ctx, configs)
     
     async def check_all_channels(self, ctx, configs):
-        """Verifica TODOS os canais do servidor"""
+        """Verifica TODOS os canais do servidor, até NOW_CONCURRENCY ao mesmo tempo.
+        
+        A mensagem mostra o progresso conforme os resultados chegam (editada
+        no máximo a cada NOW_PROGRESS_INTERVAL s); o que não terminar em
+        NOW_DEADLINE s aparece como tempo esgotado."""
         processing_msg = await ctx.send(f"⚡ **Verificando {len(configs)} canal(es)...**")
         
-        results = []
+        # None = ainda não terminou, False = erro, dict = info do canal
+        results = [None] * len(configs)
+        semaphore = asyncio.Semaphore(NOW_CONCURRENCY)
+        
+        async def check(index, config):
+            async with semaphore:
+                try:
+                    info = await extract_youtube_info(config.youtube_url)
+                except Exception:
+                    info = None
+            return index, info or False
+        
+        loop = asyncio.get_running_loop()
+        tasks = [asyncio.create_task(check(index, config)) for index, config in enumerate(configs)]
+        last_edit = loop.time()
+        try:
+            for finished in asyncio.as_completed(tasks, timeout=NOW_DEADLINE):
+                try:
+                    index, info = await finished
+                except asyncio.TimeoutError:
+                    break
+                results[index] = info
+                if loop.time() - last_edit >= NOW_PROGRESS_INTERVAL and None in results:
+                    last_edit = loop.time()
+                    await processing_msg.edit(content=None, embed=self.check_embed(ctx, configs, results, False))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        await processing_msg.edit(content=None, embed=self.check_embed(ctx, configs, results, True))
+    
+    def check_embed(self, ctx, configs, results, finished):
+        """Embed do !yt_now: parcial (⏳ nos pendentes) ou final (⏰ nos que esgotaram o tempo)"""
+        lines = []
         live_count = 0
         scheduled_count = 0
         
-        for config in configs:
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
-            try:
-                info = await extract_youtube_info(youtube_url)
-                
-                if info:
-                    status = "⏸️"
-                    if info['is_live']:
-                        status = "🎬"
-                        live_count += 1
-                    elif info['scheduled_live']:
-                        status = "📅"
-                        scheduled_count += 1
-                    
-                    results.append(f"{status} **{youtube_name}**")
-                else:
-                    results.append(f"❌ **{youtube_name}** (erro)")
-                    
-            except:
-                results.append(f"❌ **{youtube_name}** (erro)")
+        for config, info in zip(configs, results):
+            if info:
+                status = "⏸️"
+                if info['is_live']:
+                    status = "🎬"
+                    live_count += 1
+                elif info['scheduled_live']:
+                    status = "📅"
+                    scheduled_count += 1
+                lines.append(f"{status} **{config.youtube_name}**")
+            elif info is False:
+                lines.append(f"❌ **{config.youtube_name}** (erro)")
+            elif finished:
+                lines.append(f"⏰ **{config.youtube_name}** (tempo esgotado)")
+            else:
+                lines.append(f"⏳ **{config.youtube_name}**")
+        
+        done = sum(info is not None for info in results)
+        if finished:
+            title = f"📊 **Verificação Completa - {ctx.guild.name}**"
+            summary = f"**{done} de {len(configs)} canal(es) verificados**"
+        else:
+            title = f"⚡ **Verificando - {ctx.guild.name}**"
+            summary = f"**{done}/{len(configs)} canal(es) verificados até agora...**"
         
         embed = discord.Embed(
-            title=f"📊 **Verificação Completa - {ctx.guild.name}**",
-            description=f"**{len(configs)} canal(es) verificados**\n"
+            title=title,
+            description=f"{summary}\n"
                        f"🎬 **{live_count} em live** • 📅 **{scheduled_count} programadas**",
             color=0x7289DA
         )
         
         # Divide resultados em chunks para não ultrapassar limite do Discord
-        chunks = [results[i:i+10] for i in range(0, len(results), 10)]
+        chunks = [lines[i:i+10] for i in range(0, len(lines), 10)]
         
         for i, chunk in enumerate(chunks):
             embed.add_field(
-                name=f"**Canais {i*10+1}-{min((i+1)*10, len(results))}**",
+                name=f"**Canais {i*10+1}-{min((i+1)*10, len(lines))}**",
                 value="\n".join(chunk),
                 inline=False
             )
         
         embed.set_footer(text="Use !yt_info [ID] para detalhes de um canal específico")
-        await processing_msg.edit(content=None, embed=embed)
+        return embed
     
     async def check_single_channel(self, ctx, identifier):
         """Verifica um canal específico"""
-        configs = db.get_config(ctx.guild.id)
-        
-        target_config = None
-        for config in configs:
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
-            if youtube_id and identifier in youtube_id:
-                target_config = config
-                break
-            elif identifier.lower() in youtube_name.lower():
-                target_config = config
-                break
-        
-        if not target_config:
-            await ctx.send("❌ **Canal não encontrado.**")
+        config = await self.find_target(ctx, identifier, "❌ **Canal não encontrado.**")
+        if not config:
             return
         
-        config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-        last_video, last_video_title, last_video_time, last_live, last_live_title, \
-        scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-        notify_scheduled, config_user, created, last_check, is_active = target_config
-        
-        processing_msg = await ctx.send(f"⚡ **Verificando {youtube_name}...**")
+        processing_msg = await ctx.send(f"⚡ **Verificando {config.youtube_name}...**")
         
         try:
-            info = await extract_youtube_info(youtube_url)
+            info = await extract_youtube_info(config.youtube_url)
             
             if not info:
                 await processing_msg.edit(content="❌ **Erro ao verificar o canal.**")
                 return
             
             embed = discord.Embed(
-                title=f"📊 **{youtube_name} - Status Instantâneo**",
+                title=f"📊 **{config.youtube_name} - Status Instantâneo**",
                 color=0x7289DA,
                 timestamp=datetime.now()
             )
@@ -1066,7 +1955,7 @@ class YouTubeCommands(commands.Cog):
                 if not info['is_live'] and not info['scheduled_live']:
                     embed.set_thumbnail(url=info['latest_video']['thumbnail'])
             
-            embed.set_footer(text=f"ID: {youtube_id[:8]}... • Atualizado agora")
+            embed.set_footer(text=f"ID: {config.youtube_id[:8]}... • Atualizado agora")
             await processing_msg.edit(content=None, embed=embed)
             
         except Exception as e:
@@ -1076,7 +1965,7 @@ class YouTubeCommands(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def manage_settings(self, ctx, identifier=None, setting=None, value=None):
         """⚙️ Gerencia configurações de um canal específico"""
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not configs:
             await ctx.send("❌ **Nenhum canal configurado.**")
@@ -1091,14 +1980,9 @@ class YouTubeCommands(commands.Cog):
             )
             
             for config in configs:
-                config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-                last_video, last_video_title, last_video_time, last_live, last_live_title, \
-                scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-                notify_scheduled, config_user, created, last_check, is_active = config
-                
                 embed.add_field(
-                    name=f"**{youtube_name}**",
-                    value=f"`!yt_settings {youtube_id[:8]} [config] [on/off]`",
+                    name=f"**{config.youtube_name}**",
+                    value=f"`!yt_settings {config.youtube_id[:8]} [config] [on/off]`",
                     inline=True
                 )
             
@@ -1108,6 +1992,7 @@ class YouTubeCommands(commands.Cog):
                       "videos     - Notificar novos vídeos\n"
                       "lives      - Notificar lives em andamento\n"
                       "scheduled  - Notificar lives programadas\n"
+                      "intervalo  - Segundos entre verificações (ou auto)\n"
                       "```",
                 inline=False
             )
@@ -1116,45 +2001,23 @@ class YouTubeCommands(commands.Cog):
             return
         
         # Procura o canal
-        target_config = None
-        target_youtube_id = None
-        
-        for config in configs:
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
-            if youtube_id and identifier in youtube_id:
-                target_config = config
-                target_youtube_id = youtube_id
-                break
-            elif identifier.lower() in youtube_name.lower():
-                target_config = config
-                target_youtube_id = youtube_id
-                break
-        
-        if not target_config:
-            await ctx.send("❌ **Canal não encontrado.**")
+        config = await self.find_target(ctx, identifier, "❌ **Canal não encontrado.**")
+        if not config:
             return
-        
-        config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-        last_video, last_video_title, last_video_time, last_live, last_live_title, \
-        scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-        notify_scheduled, config_user, created, last_check, is_active = target_config
+        target_youtube_id = config.youtube_id
         
         if not setting:
             # Mostra configurações atuais do canal específico
             embed = discord.Embed(
-                title=f"⚙️ **Configurações - {youtube_name}**",
-                description=f"**ID:** `{youtube_id[:8]}...`",
+                title=f"⚙️ **Configurações - {config.youtube_name}**",
+                description=f"**ID:** `{config.youtube_id[:8]}...`",
                 color=0x7289DA
             )
             
             settings_info = [
-                f"{'✅' if notify_videos else '❌'} **Vídeos novos** - `!yt_settings {youtube_id[:8]} videos on/off`",
-                f"{'✅' if notify_lives else '❌'} **Lives em andamento** - `!yt_settings {youtube_id[:8]} lives on/off`",
-                f"{'✅' if notify_scheduled else '❌'} **Lives programadas** - `!yt_settings {youtube_id[:8]} scheduled on/off`",
+                f"{'✅' if config.notify_videos else '❌'} **Vídeos novos** - `!yt_settings {config.youtube_id[:8]} videos on/off`",
+                f"{'✅' if config.notify_lives else '❌'} **Lives em andamento** - `!yt_settings {config.youtube_id[:8]} lives on/off`",
+                f"{'✅' if config.notify_scheduled else '❌'} **Lives programadas** - `!yt_settings {config.youtube_id[:8]} scheduled on/off`",
             ]
             
             embed.add_field(
@@ -1163,6 +2026,38 @@ class YouTubeCommands(commands.Cog):
                 inline=False
             )
             
+            override = await db.get_poll_override(ctx.guild.id, config.youtube_id)
+            embed.add_field(
+                name="⏱️ **Intervalo de verificação**",
+                value=f"{f'{override} segundos' if override else 'Automático (pela atividade do canal)'}\n"
+                      f"`!yt_settings {config.youtube_id[:8]} intervalo <segundos|auto>`",
+                inline=False
+            )
+            
+            await ctx.send(embed=embed)
+            return
+        
+        # Intervalo de verificação (sobrepõe o automático)
+        if setting.lower() in ('intervalo', 'interval'):
+            if value and value.isdigit():
+                seconds = min(max(int(value), POLL_MIN), POLL_MAX)
+                status = f"**{seconds} segundos**"
+            elif value and value.lower() in ('auto', 'automatico', 'automático', 'off'):
+                seconds = None
+                status = "**Automático**"
+            else:
+                await ctx.send(f"❌ **Use:** `!yt_settings {config.youtube_id[:8]} intervalo <{POLL_MIN}-{POLL_MAX}|auto>`")
+                return
+            
+            await db.set_poll_override(ctx.guild.id, target_youtube_id, seconds)
+            await scheduler.refresh(force=True)
+            scheduler.reschedule(target_youtube_id)
+            
+            embed = discord.Embed(
+                title="⚙️ **Configuração Alterada**",
+                description=f"**{config.youtube_name}**\n**Intervalo:** {status}",
+                color=0x00FF00
+            )
             await ctx.send(embed=embed)
             return
         
@@ -1189,11 +2084,11 @@ class YouTubeCommands(commands.Cog):
             db_value = 0
             status = "❌ **DESATIVADO**"
         
-        db.update_setting(ctx.guild.id, target_youtube_id, db_setting, db_value)
+        await db.update_setting(ctx.guild.id, target_youtube_id, db_setting, db_value)
         
         embed = discord.Embed(
             title="⚙️ **Configuração Alterada**",
-            description=f"**{youtube_name}**\n**{setting.capitalize()}:** {status}",
+            description=f"**{config.youtube_name}**\n**{setting.capitalize()}:** {status}",
             color=0x00FF00 if db_value else 0xFF0000
         )
         
@@ -1203,7 +2098,7 @@ class YouTubeCommands(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def remove_monitor(self, ctx, identifier=None):
         """🗑️ Remove monitoramento de um canal específico"""
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not configs:
             await ctx.send("❌ **Nenhum canal configurado.**")
@@ -1218,14 +2113,9 @@ class YouTubeCommands(commands.Cog):
             )
             
             for config in configs:
-                config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-                last_video, last_video_title, last_video_time, last_live, last_live_title, \
-                scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-                notify_scheduled, config_user, created, last_check, is_active = config
-                
                 embed.add_field(
-                    name=f"**{youtube_name}**",
-                    value=f"`!yt_remove {youtube_id[:8]}`",
+                    name=f"**{config.youtube_name}**",
+                    value=f"`!yt_remove {config.youtube_id[:8]}`",
                     inline=True
                 )
             
@@ -1234,30 +2124,11 @@ class YouTubeCommands(commands.Cog):
             return
         
         # Procura o canal
-        target_config = None
-        target_youtube_id = None
-        target_youtube_name = None
-        
-        for config in configs:
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
-            if youtube_id and identifier in youtube_id:
-                target_config = config
-                target_youtube_id = youtube_id
-                target_youtube_name = youtube_name
-                break
-            elif identifier.lower() in youtube_name.lower():
-                target_config = config
-                target_youtube_id = youtube_id
-                target_youtube_name = youtube_name
-                break
-        
-        if not target_config:
-            await ctx.send("❌ **Canal não encontrado.**")
+        config = await self.find_target(ctx, identifier, "❌ **Canal não encontrado.**")
+        if not config:
             return
+        target_youtube_id = config.youtube_id
+        target_youtube_name = config.youtube_name
         
         # Confirmação
         embed = discord.Embed(
@@ -1282,8 +2153,8 @@ class YouTubeCommands(commands.Cog):
             msg = await bot.wait_for('message', timeout=30.0, check=check)
             
             if msg.content.upper() == 'SIM':
-                if db.delete_config(ctx.guild.id, target_youtube_id):
-                    remaining = db.get_server_configs_count(ctx.guild.id)
+                if await db.delete_config(ctx.guild.id, target_youtube_id):
+                    remaining = await db.get_server_configs_count(ctx.guild.id)
                     
                     embed = discord.Embed(
                         title="✅ **Canal Removido!**",
@@ -1307,7 +2178,7 @@ class YouTubeCommands(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def remove_all_monitors(self, ctx):
         """🗑️ Remove TODOS os canais do servidor"""
-        configs = db.get_config(ctx.guild.id)
+        configs = await db.get_config(ctx.guild.id)
         
         if not configs:
             await ctx.send("❌ **Nenhum canal configurado.**")
@@ -1337,7 +2208,7 @@ class YouTubeCommands(commands.Cog):
             msg = await bot.wait_for('message', timeout=30.0, check=check)
             
             if msg.content.upper() == 'REMOVER TUDO':
-                if db.delete_config(ctx.guild.id):
+                if await db.delete_config(ctx.guild.id):
                     embed = discord.Embed(
                         title="✅ **TODOS os Canais Removidos!**",
                         description=f"**{total_canais} canal(es) removidos**\n\n"
@@ -1356,13 +2227,84 @@ class YouTubeCommands(commands.Cog):
         except asyncio.TimeoutError:
             await ctx.send("⏰ **Tempo esgotado.** Remoção cancelada.")
     
+    @commands.command(name='yt_history')
+    async def show_history(self, ctx, before=None):
+        """📜 Mostra as últimas notificações do servidor"""
+        cursor = int(before) if before and before.isdigit() else None
+        rows = await db.get_history(ctx.guild.id, HISTORY_PAGE_SIZE + 1, cursor)
+        
+        if not rows:
+            await ctx.send("📭 **Nenhuma notificação no histórico.**" if cursor is None
+                           else "📭 **Não há notificações mais antigas.**")
+            return
+        
+        has_more = len(rows) > HISTORY_PAGE_SIZE
+        rows = rows[:HISTORY_PAGE_SIZE]
+        icons = {'video': '📹', 'live': '🎬', 'scheduled': '📅'}
+        
+        lines = []
+        for event_id, video_id, title, video_type, notified_at, channel_name in rows:
+            lines.append(f"{icons.get(video_type, '🔔')} **{channel_name}** - "
+                         f"[{title[:60]}](https://www.youtube.com/watch?v={video_id})\n"
+                         f"⏰ {notified_at[:16].replace('T', ' ')}")
+        
+        embed = discord.Embed(
+            title="📜 **Histórico de Notificações**",
+            description="\n".join(lines),
+            color=0x7289DA
+        )
+        
+        if has_more:
+            embed.set_footer(text=f"Mais antigas: !yt_history {rows[-1][0]}")
+        else:
+            embed.set_footer(text="Fim do histórico")
+        await ctx.send(embed=embed)
+    
+    @commands.command(name='yt_webhook')
+    @commands.has_permissions(administrator=True)
+    async def manage_webhook(self, ctx, mode=None):
+        """🪝 Liga/desliga a entrega dos alertas deste canal por webhook"""
+        saved = db.webhooks.get(ctx.channel.id)
+        
+        if not mode:
+            status = "✅ **Ligado**" if saved else "❌ **Desligado** (alertas saem pelo bot)"
+            await ctx.send(f"🪝 **Modo webhook neste canal:** {status}\n"
+                           f"Use `!yt_webhook on` ou `!yt_webhook off`.")
+            return
+        
+        if mode.lower() in ['on', 'sim', 'yes', 'true', '1', 'ativar', 'ativado']:
+            if saved:
+                await ctx.send("✅ **Este canal já recebe os alertas por webhook.**")
+                return
+            if not ctx.channel.permissions_for(ctx.guild.me).manage_webhooks:
+                await ctx.send("❌ **Preciso da permissão Gerenciar Webhooks neste canal.**")
+                return
+            try:
+                webhook = await ctx.channel.create_webhook(name="YouTube Monitor",
+                                                           reason="Alertas do YouTube Monitor")
+            except discord.HTTPException as e:
+                await ctx.send(f"❌ **Não consegui criar o webhook:** {e.text or e.status}")
+                return
+            await db.set_webhook(ctx.channel.id, webhook.id, webhook.token)
+            await ctx.send("✅ **Alertas deste canal agora saem por webhook.**\n"
+                           "Se o webhook for apagado, volto a enviar pelo bot sozinho.")
+            return
+        
+        if saved:
+            await db.delete_webhook(ctx.channel.id)
+            try:
+                await discord.Webhook.partial(saved[0], saved[1], session=bot.get_webhook_session()).delete()
+            except discord.HTTPException:
+                pass  # já apagado
+        await ctx.send("❌ **Modo webhook desligado.** Os alertas deste canal saem pelo bot.")
+    
     @commands.command(name='yt_help')
     async def show_help(self, ctx):
         """📚 Mostra ajuda completa"""
         embed = discord.Embed(
             title="📚 **YouTube Monitor MULTI-CANAL**",
             description="**Sistema de monitoramento MULTI-CANAL**\n"
-                       "⚡ **Verificação:** A cada 30 segundos!",
+                       f"⚡ **Verificação:** Adaptativa - canais ativos e em live a cada {POLL_MIN} segundos!",
             color=0x7289DA
         )
         
@@ -1376,6 +2318,8 @@ class YouTubeCommands(commands.Cog):
             ("⚙️ `!yt_settings`", "Gerenciar notificações"),
             ("🗑️ `!yt_remove [ID]`", "Remover um canal"),
             ("🗑️ `!yt_remove_all`", "Remover TODOS os canais"),
+            ("📜 `!yt_history`", "Ver as últimas notificações enviadas"),
+            ("🪝 `!yt_webhook on/off`", "Enviar os alertas deste canal por webhook"),
             ("📚 `!yt_help`", "Esta mensagem de ajuda")
         ]
         
@@ -1403,10 +2347,12 @@ class YouTubeCommands(commands.Cog):
         # Informações técnicas
         embed.add_field(
             name="⚡ **Tempos de verificação:**",
-            value="• **Automático:** 30 segundos\n"
-                  "• **Lives:** Detecta em 30-60 segundos\n"
-                  "• **Vídeos:** Detecta em 1-2 minutos\n"
-                  "• **Programadas:** Detecta imediatamente",
+            value=f"• **Automático:** {POLL_MIN} s a {POLL_MAX // 60} min, conforme a atividade do canal\n"
+                  f"• **Lives:** {live_detection_text()}\n"
+                  "• **Vídeos:** Na próxima verificação do canal"
+                  f"{' ou na hora, por WebSub' if WEBSUB_CALLBACK_URL else ''}\n"
+                  "• **Programadas:** Junto com as lives; perto do horário marcado, "
+                  f"a cada {LIVE_BURST_INTERVAL} s",
             inline=False
         )
         
@@ -1423,131 +2369,581 @@ class YouTubeCommands(commands.Cog):
         await ctx.send(embed=embed)
 
 # ========== SISTEMA DE MONITORAMENTO MULTI-CANAL ==========
-@tasks.loop(seconds=30)
-async def multi_channel_monitor():
-    """Monitoramento MULTI-CANAL - 30 segundos!"""
-    await bot.wait_until_ready()
+def live_detection_text():
+    """Quando uma live é percebida, conforme LIVE_PAGE_INTERVAL (para a ajuda)"""
+    if not LIVE_PAGE_INTERVAL:
+        return "Conferidas em toda verificação do canal"
+    return (f"Conferidas no máximo a cada {LIVE_PAGE_INTERVAL} s "
+            f"(o alerta pode atrasar até {LIVE_PAGE_INTERVAL} s além da verificação)")
+
+def build_live_embed(info):
+    """Embed de live em andamento (montado uma vez por evento)"""
+    embed = discord.Embed(
+        title=f"🎬 **{info['channel_name']} ENTROU AO VIVO!**",
+        description=f"**{info['live_info']['title']}**\n\n"
+                  f"🔗 [▶️ Assistir AGORA]({info['live_info']['url']})",
+        color=0xFF0000,
+        url=info['live_info']['url']
+    )
+    embed.set_image(url=info['live_info']['thumbnail'])
+    embed.set_footer(text="⚡ Live detectada pelo monitor automático")
+    return embed
+
+def build_scheduled_embed(info):
+    """Embed de live programada (montado uma vez por evento)"""
+    embed = discord.Embed(
+        title=f"📅 **{info['channel_name']} PROGRAMOU LIVE!**",
+        description=f"**{info['scheduled_live']['title']}**\n\n"
+                  f"⏰ **Data/Hora:** {info['scheduled_live']['scheduled_time']}\n"
+                  f"🔗 [🔔 Definir lembrete]({info['scheduled_live']['url']})",
+        color=0xFFA500,
+        url=info['scheduled_live']['url']
+    )
+    embed.set_image(url=info['scheduled_live']['thumbnail'])
+    embed.set_footer(text="Live programada detectada")
+    return embed
+
+def build_video_embed(info, video=None):
+    """Embed de vídeo novo (montado uma vez por evento); `video` padrão é o mais recente"""
+    video = video or info['latest_video']
+    embed = discord.Embed(
+        title=f"📹 **{info['channel_name']} POSTOU VÍDEO NOVO!**",
+        description=f"**{video['title']}**\n\n"
+                  f"⏰ **Publicado:** {video['publish_time']}\n"
+                  f"🔗 [▶️ Assistir agora]({video['url']})",
+        color=0x00FF00,
+        url=video['url']
+    )
+    embed.set_image(url=video['thumbnail'])
+    embed.set_footer(text="Vídeo novo detectado")
+    return embed
+
+async def notify_subscribers(youtube_id, subscribers, info):
+    """Avalia last_video / last_live / scheduled_live de cada servidor inscrito
+    no canal e envia as notificações. Cada embed é montado uma única vez.
     
-    configs = db.get_active_configs()
-    if not configs:
-        return
+    Vídeos novos são os da lista recent_videos que não estão no conjunto de
+    vistos do canal (db.seen), todos de uma vez; canal ainda sem vistos
+    guardados cai para a comparação do mais recente com last_video."""
+    embeds = {}
     
-    print(f"⚡ Verificando {len(configs)} canais em {len(set(c[1] for c in configs))} servidores...")
+    recent = info.get('recent_videos') or ([info['latest_video']] if info['latest_video'] else [])
+    # Lives aparecem na lista de vídeos, mas são avisadas como live/programada
+    lives = {item['id'] for item in (info['live_info'], info['scheduled_live']) if item}
+    uploads = [video for video in recent if video.get('id') and video['id'] not in lives]
+    known = db.seen.known(youtube_id)
+    fresh = db.seen.unseen(youtube_id, uploads)
     
-    for config in configs:
+    def get_embed(kind, builder):
+        if kind not in embeds:
+            embeds[kind] = builder(info)
+        return embeds[kind]
+    
+    for config in subscribers:
         try:
-            config_id, server_id, channel_id, youtube_url, youtube_name, youtube_id, \
-            last_video, last_video_title, last_video_time, last_live, last_live_title, \
-            scheduled_live, scheduled_live_time, notify_videos, notify_lives, \
-            notify_scheduled, config_user, created, last_check, is_active = config
-            
             # Pula se não tem notificações ativas
-            if not (notify_videos or notify_lives or notify_scheduled):
+            if not (config.notify_videos or config.notify_lives or config.notify_scheduled):
                 continue
             
-            guild = bot.get_guild(int(server_id))
+            guild = bot.get_guild(int(config.server_id))
             if not guild:
                 continue
             
-            channel = guild.get_channel(int(channel_id))
+            channel = guild.get_channel(int(config.channel_id))
             if not channel:
                 continue
             
-            # Extrai informações
-            info = await extract_youtube_info(youtube_url)
-            if not info:
-                continue
-            
             # 1. VERIFICA LIVE EM ANDAMENTO
-            if notify_lives and info['is_live'] and info['live_info']:
+            if config.notify_lives and info['is_live'] and info['live_info']:
                 live_id = info['live_info']['id']
                 
-                if live_id and live_id != last_live:
+                if live_id and live_id != config.last_live:
                     # Atualiza banco
-                    db.update_live(server_id, youtube_id, live_id, info['live_info']['title'])
-                    db.add_history(server_id, youtube_id, live_id, 
+                    await db.update_live(config.server_id, youtube_id, live_id, info['live_info']['title'])
+                    await db.add_history(config.server_id, youtube_id, live_id, 
                                  info['live_info']['title'], 'live', info['channel_name'])
                     
-                    # Envia notificação
-                    embed = discord.Embed(
-                        title=f"🎬 **{info['channel_name']} ENTROU AO VIVO!**",
-                        description=f"**{info['live_info']['title']}**\n\n"
-                                  f"🔗 [▶️ Assistir AGORA]({info['live_info']['url']})",
-                        color=0xFF0000,
-                        url=info['live_info']['url']
-                    )
-                    embed.set_image(url=info['live_info']['thumbnail'])
-                    embed.set_footer(text="⚡ Detectado em menos de 30 segundos!")
-                    
-                    await channel.send(f"@everyone", embed=embed)
+                    # Põe na fila de envio (faixa de lives ou normal)
+                    dispatcher.submit(delivery_target(channel), "@everyone", [get_embed('live', build_live_embed)], LIVE)
                     print(f"⚡ LIVE: {info['channel_name']} em {guild.name}")
             
             # 2. VERIFICA LIVE PROGRAMADA
-            if notify_scheduled and info['scheduled_live']:
+            if config.notify_scheduled and info['scheduled_live']:
                 scheduled_id = info['scheduled_live']['id']
                 
-                if scheduled_id and scheduled_id != scheduled_live:
+                if scheduled_id and scheduled_id != config.scheduled_live:
                     # Atualiza banco
-                    db.update_scheduled(server_id, youtube_id, scheduled_id, 
+                    await db.update_scheduled(config.server_id, youtube_id, scheduled_id, 
                                        info['scheduled_live']['title'],
                                        info['scheduled_live']['scheduled_time'])
-                    db.add_history(server_id, youtube_id, scheduled_id, 
+                    await db.add_history(config.server_id, youtube_id, scheduled_id, 
                                  info['scheduled_live']['title'], 'scheduled', info['channel_name'])
                     
-                    # Envia notificação
-                    embed = discord.Embed(
-                        title=f"📅 **{info['channel_name']} PROGRAMOU LIVE!**",
-                        description=f"**{info['scheduled_live']['title']}**\n\n"
-                                  f"⏰ **Data/Hora:** {info['scheduled_live']['scheduled_time']}\n"
-                                  f"🔗 [🔔 Definir lembrete]({info['scheduled_live']['url']})",
-                        color=0xFFA500,
-                        url=info['scheduled_live']['url']
-                    )
-                    embed.set_image(url=info['scheduled_live']['thumbnail'])
-                    embed.set_footer(text="Live programada detectada")
-                    
-                    await channel.send(f"📅 **LIVE PROGRAMADA POR {info['channel_name']}!**", embed=embed)
+                    # Põe na fila de envio (faixa de lives ou normal)
+                    dispatcher.submit(delivery_target(channel), f"📅 **LIVE PROGRAMADA POR {info['channel_name']}!**",
+                                      [get_embed('scheduled', build_scheduled_embed)], NORMAL)
                     print(f"📅 SCHEDULED: {info['channel_name']} em {guild.name}")
             
-            # 3. VERIFICA VÍDEO NOVO
-            if notify_videos and info['latest_video']:
-                video_id = info['latest_video']['id']
+            # 3. VERIFICA VÍDEOS NOVOS
+            if config.notify_videos and uploads:
+                if known:
+                    videos = [video for video in fresh if video['id'] != config.last_video]
+                    if not config.last_video and not videos:
+                        videos = uploads[:1]  # primeira notificação deste servidor
+                else:
+                    videos = uploads[:1] if uploads[0]['id'] != config.last_video else []
                 
-                if video_id and video_id != last_video:
-                    # Atualiza banco
-                    db.update_video(server_id, youtube_id, video_id, 
-                                   info['latest_video']['title'],
-                                   info['latest_video']['publish_time'])
-                    db.add_history(server_id, youtube_id, video_id, 
-                                 info['latest_video']['title'], 'video', info['channel_name'])
+                if videos:
+                    # Atualiza banco (last_video fica com o mais novo)
+                    newest = videos[0]
+                    await db.update_video(config.server_id, youtube_id, newest['id'],
+                                          newest['title'], newest['publish_time'])
+                    for video in reversed(videos):
+                        await db.add_history(config.server_id, youtube_id, video['id'],
+                                             video['title'], 'video', info['channel_name'])
                     
-                    # Envia notificação
-                    embed = discord.Embed(
-                        title=f"📹 **{info['channel_name']} POSTOU VÍDEO NOVO!**",
-                        description=f"**{info['latest_video']['title']}**\n\n"
-                                  f"⏰ **Publicado:** {info['latest_video']['publish_time']}\n"
-                                  f"🔗 [▶️ Assistir agora]({info['latest_video']['url']})",
-                        color=0x00FF00,
-                        url=info['latest_video']['url']
-                    )
-                    embed.set_image(url=info['latest_video']['thumbnail'])
-                    embed.set_footer(text="Vídeo novo detectado")
-                    
-                    await channel.send(f"🎬 **NOVO VÍDEO DE {info['channel_name']}!**", embed=embed)
-                    print(f"📹 VIDEO: {info['channel_name']} em {guild.name}")
-            
-            await asyncio.sleep(0.5)  # Pequena pausa entre canais
+                    # Põe na fila de envio (uma mensagem, um embed por vídeo, do mais antigo)
+                    batch = [get_embed(('video', video['id']), functools.partial(build_video_embed, video=video))
+                             for video in reversed(videos[:10])]
+                    if len(batch) == 1:
+                        content = f"🎬 **NOVO VÍDEO DE {info['channel_name']}!**"
+                    else:
+                        content = f"🎬 **{len(batch)} VÍDEOS NOVOS DE {info['channel_name']}!**"
+                    dispatcher.submit(delivery_target(channel), content, batch, NORMAL)
+                    print(f"📹 VIDEO: {info['channel_name']} em {guild.name} ({len(batch)})")
             
         except Exception as e:
-            print(f"❌ Erro monitorando {config[4] if len(config) > 4 else 'desconhecido'}: {e}")
+            print(f"❌ Erro notificando {getattr(config, 'youtube_name', 'desconhecido')}: {e}")
+            continue
+    
+    # Lives e programadas também: quando a transmissão acaba, o VOD aparece
+    # na lista de vídeos e não pode virar um alerta de vídeo novo
+    live_items = [item for item in (info['live_info'], info['scheduled_live']) if item]
+    await db.mark_seen(youtube_id, [video for video in live_items + recent if video.get('id')])
+
+def wants_page(subscribers):
+    """Algum servidor quer lives ou lives programadas (só a página mostra isso)"""
+    return any(config.notify_lives or config.notify_scheduled for config in subscribers)
+
+def merge_pushed_videos(feed, pushed, since=0):
+    """Põe na frente do feed os vídeos do WebSub que o feed (em cache) ainda não tem.
+    
+    O hub também avisa quando um vídeo antigo é editado; só entram os que
+    são mais novos que o vídeo mais recente do feed e publicados depois de
+    `since`. Também serve para o info da página, cujos vídeos não têm data."""
+    known = {video['id'] for video in feed['recent_videos']}
+    latest = feed['latest_video']
+    newest = max(since, latest.get('timestamp', 0) if latest else 0)
+    new = [video for video in pushed
+           if video['id'] not in known and video.get('timestamp', 0) >= newest]
+    if not new:
+        return feed
+    
+    merged = dict(feed)
+    merged['recent_videos'] = (new + feed['recent_videos'])[:MAX_RECENT_VIDEOS]
+    merged['latest_video'] = merged['recent_videos'][0]
+    return merged
+
+async def on_websub_notification(youtube_id, feed):
+    """Aviso de vídeo novo via WebSub: guarda os vídeos e verifica o canal já"""
+    if not db.registry.by_channel.get(youtube_id):
+        return
+    pushed_videos.setdefault(youtube_id, []).extend(feed['recent_videos'])
+    if youtube_id in scheduler.due:
+        scheduler.push(youtube_id, 0)
+    else:
+        # Fora da fila porque está sendo verificado agora: volta assim que terminar
+        scheduler.recheck.add(youtube_id)
+    print(f"📨 WebSub: {feed['latest_video']['title']} ({youtube_id})")
+
+def subscribers_state(subscribers):
+    """O que, nos inscritos, muda o resultado das notificações"""
+    return tuple((c.id, c.last_video, c.last_live, c.scheduled_live, c.notify_videos,
+                  c.notify_lives, c.notify_scheduled) for c in subscribers)
+
+async def check_channel(youtube_id, subscribers):
+    """Busca o estado de um canal para o monitor: devolve (info, estado).
+    
+    Canais com ID UC... têm os vídeos lidos do feed Atom (bem menor que a
+    página e com data real de publicação). A página do canal só é baixada
+    quando o feed falha ou quando alguém quer lives/programadas e
+    scheduler.page_due() libera; entre uma página e outra vale o último
+    resultado analisado dela. Se os dois vierem, os vídeos do feed têm
+    prioridade. Vídeos avisados por WebSub entram no feed ou, sem ele, na
+    página baixada nesta verificação.
+    
+    A página é pedida com GET condicional e resumida por page_fingerprint.
+    Se página, feed e inscritos estão iguais à última verificação notificada,
+    devolve info None sem analisar nada (nem JSON, nem regex, nem banco)."""
+    url = subscribers[0].youtube_url
+    feed = None
+    if YOUTUBE_FEEDS and youtube_id.startswith('UC'):
+        feed = await fetch_channel_feed(youtube_id)
+    pushed = pushed_videos.pop(youtube_id, None)
+    if feed and pushed:
+        feed = merge_pushed_videos(feed, pushed)
+    
+    html = None
+    fingerprint = None
+    fetched = False
+    if feed is None or (wants_page(subscribers) and scheduler.page_due(youtube_id)):
+        scheduler.page_checks[youtube_id] = time.monotonic()
+        html = await fetch_youtube_data(url, conditional=True)
+        fetched = html is not None
+        if html is NOT_MODIFIED:
+            fingerprint = page_cache.results[url][0]
+        elif html:
+            fingerprint = page_fingerprint(html)
+    elif wants_page(subscribers) and url in page_cache.results:
+        # Página conferida há pouco: lives e programadas de lá continuam valendo
+        html = NOT_MODIFIED
+        fingerprint = page_cache.results[url][0]
+    
+    feed_ids = tuple(video['id'] for video in feed['recent_videos']) if feed else None
+    state = (fingerprint, feed_ids, subscribers_state(subscribers))
+    # Avisos WebSub sem feed para juntá-los: a página igual não basta para pular
+    comparable = (fingerprint is not None or (html is None and feed_ids)) and not (pushed and not feed)
+    if comparable and page_cache.states.get(youtube_id) == state:
+        page_cache.unchanged += 1
+        return None, state
+    page_cache.changed += 1
+    
+    info = None
+    if html is NOT_MODIFIED:
+        info = dict(page_cache.results[url][1])
+    elif html:
+        info = await parse_in_pool(html, url)
+        if fingerprint is not None:
+            page_cache.results[url] = (fingerprint, dict(info))
+    
+    if info and feed and feed['latest_video']:
+        info['latest_video'] = feed['latest_video']
+        info['recent_videos'] = feed['recent_videos']
+    elif pushed and not feed:
+        if info:
+            # Sem feed (falhou ou YOUTUBE_FEEDS=0): a página baixada agora faz o
+            # papel dele, com os vídeos avisados publicados nos últimos POLL_MAX s
+            info = merge_pushed_videos(info, pushed, since=time.time() - POLL_MAX)
+        else:
+            # Nem feed nem página: os avisos ficam para a próxima verificação
+            pushed_videos.setdefault(youtube_id, [])[:0] = pushed
+    if info and fetched:
+        # Página conferida agora (200 ou 304): os comandos respondem com ela sem
+        # buscar de novo. A reaproveitada de page_cache pode ser velha e não entra
+        snapshots.put(channel_key(url), dict(info))
+    if info or not feed:
+        return info, state
+    
+    return {
+        'channel_name': feed.get('channel_name') or subscribers[0].youtube_name,
+        'channel_id': youtube_id,
+        'is_live': False,
+        'live_info': None,
+        'scheduled_live': None,
+        'latest_video': feed['latest_video'],
+        'recent_videos': feed['recent_videos'],
+        'channel_url': url
+    }, state
+
+def scheduled_start(scheduled_time):
+    """'dd/mm/YYYY HH:MM' guardado em scheduled_live_time -> timestamp (0 se não der)"""
+    try:
+        return int(datetime.strptime(scheduled_time, '%d/%m/%Y %H:%M').timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+class ChannelScheduler:
+    """Fila de prioridade (heap) de canais pela próxima verificação.
+    
+    O intervalo de cada canal cai de POLL_MAX para POLL_MIN conforme o
+    número de vídeos/lives notificados nos últimos ACTIVITY_DAYS dias (lido
+    do histórico), fica em POLL_MIN enquanto o canal está em live e
+    respeita o intervalo definido por admins. Um jitter de ±POLL_JITTER
+    espalha as verificações para não caírem todas juntas.
+    
+    Lives programadas ficam num segundo heap, pela hora de início. Quando
+    ela se aproxima, o canal entra numa rajada de verificações a cada
+    LIVE_BURST_INTERVAL s até a live aparecer ou a janela acabar, e depois
+    volta ao ritmo normal."""
+    def __init__(self):
+        self.heap = []
+        self.due = {}
+        self.live = set()
+        self.upcoming = []
+        self.watched = set()
+        self.bursts = {}
+        self.page_checks = {}
+        self.recheck = set()
+        self.push_active = set()
+        self.wants_live = set()
+        self.activity = {}
+        self.overrides = {}
+        self.refreshed = None
+    
+    async def refresh(self, force=False):
+        """Relê atividade e intervalos dos admins (a cada ACTIVITY_REFRESH segundos)"""
+        now = time.monotonic()
+        if not force and self.refreshed is not None and now - self.refreshed < ACTIVITY_REFRESH:
+            return
+        self.activity = await db.get_channel_activity(datetime.now() - timedelta(days=ACTIVITY_DAYS))
+        self.overrides = await db.get_poll_overrides()
+        self.refreshed = now
+    
+    def interval(self, youtube_id):
+        """Segundos até a próxima verificação do canal (sem jitter)"""
+        if youtube_id in self.live:
+            return POLL_MIN
+        burst_end = self.bursts.get(youtube_id)
+        if burst_end:
+            if time.time() < burst_end:
+                return LIVE_BURST_INTERVAL
+            del self.bursts[youtube_id]
+        override = self.overrides.get(youtube_id)
+        if override:
+            return min(max(override, POLL_MIN), POLL_MAX)
+        if youtube_id in self.push_active and youtube_id not in self.wants_live and youtube_id not in pushed_videos:
+            # Vídeos novos chegam por WebSub; a verificação é só de segurança
+            return max(PUSH_SAFETY_POLL, POLL_MIN)
+        events = self.activity.get(youtube_id, 0)
+        return max(POLL_MIN, POLL_MAX / (1 + events))
+    
+    def page_due(self, youtube_id):
+        """Hora de baixar a página do canal para ver lives (além do feed)"""
+        if youtube_id in self.live or youtube_id in self.bursts:
+            return True
+        last = self.page_checks.get(youtube_id)
+        return last is None or time.monotonic() - last >= LIVE_PAGE_INTERVAL
+    
+    def push(self, youtube_id, delay):
+        due = time.monotonic() + delay
+        self.due[youtube_id] = due
+        heapq.heappush(self.heap, (due, youtube_id))
+    
+    def sync(self, groups):
+        """Agenda canais novos (espalhados no primeiro POLL_MIN) e esquece os removidos"""
+        self.wants_live = {youtube_id for youtube_id, subscribers in groups.items()
+                           if wants_page(subscribers)}
+        for youtube_id, subscribers in groups.items():
+            if youtube_id not in self.due:
+                self.push(youtube_id, random.uniform(0, POLL_MIN))
+                # Canal novo (ou bot reiniciado): acompanha as programadas já guardadas
+                for config in subscribers:
+                    if config.scheduled_live_time:
+                        self.watch_scheduled(youtube_id, scheduled_start(config.scheduled_live_time))
+        for youtube_id in [k for k in self.due if k not in groups]:
+            del self.due[youtube_id]
+            self.live.discard(youtube_id)
+            self.bursts.pop(youtube_id, None)
+            self.page_checks.pop(youtube_id, None)
+            self.recheck.discard(youtube_id)
+    
+    def watch_scheduled(self, youtube_id, start_time):
+        """Acompanha uma live programada (timestamp de início)"""
+        if not start_time or (youtube_id, start_time) in self.watched:
+            return
+        if start_time + LIVE_BURST_AFTER < time.time():
+            return
+        self.watched.add((youtube_id, start_time))
+        heapq.heappush(self.upcoming, (start_time - LIVE_BURST_BEFORE, youtube_id, start_time))
+    
+    def start_bursts(self):
+        """Abre a rajada dos canais cuja live programada está para começar"""
+        now = time.time()
+        while self.upcoming and self.upcoming[0][0] <= now:
+            _, youtube_id, start_time = heapq.heappop(self.upcoming)
+            if youtube_id not in self.due or youtube_id in self.live:
+                continue
+            self.bursts[youtube_id] = max(self.bursts.get(youtube_id, 0), start_time + LIVE_BURST_AFTER)
+            self.push(youtube_id, 0)
+            print(f"⏰ Live programada de {youtube_id} às "
+                  f"{datetime.fromtimestamp(start_time).strftime('%H:%M')}: "
+                  f"verificando a cada {LIVE_BURST_INTERVAL}s")
+        # Esquece lives cuja janela já passou
+        self.watched = {w for w in self.watched if w[1] + LIVE_BURST_AFTER >= now}
+    
+    def pop_due(self):
+        """Canais cuja hora chegou (saem da fila até serem reagendados)"""
+        now = time.monotonic()
+        ready = []
+        while self.heap and self.heap[0][0] <= now:
+            due, youtube_id = heapq.heappop(self.heap)
+            # Entradas antigas (canal removido ou reagendado) são ignoradas
+            if self.due.get(youtube_id) == due:
+                del self.due[youtube_id]
+                ready.append(youtube_id)
+        return ready
+    
+    def reschedule(self, youtube_id, info=None):
+        """Volta o canal para a fila; `info` atualiza o estado de live"""
+        if info is not None:
+            if info['is_live']:
+                self.live.add(youtube_id)
+                self.bursts.pop(youtube_id, None)
+            else:
+                self.live.discard(youtube_id)
+            if info['scheduled_live']:
+                self.watch_scheduled(youtube_id, info['scheduled_live'].get('start_time'))
+        if youtube_id in self.recheck:
+            # Aviso WebSub chegou durante a verificação
+            self.recheck.discard(youtube_id)
+            self.push(youtube_id, 0)
+            return
+        interval = self.interval(youtube_id)
+        self.push(youtube_id, interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+
+scheduler = ChannelScheduler()
+
+async def monitor_worker(jobs, results):
+    """Worker do monitor: pega canais da fila, busca e analisa com timeout.
+    
+    Cada worker segura no máximo um HTML por vez, então nunca há mais que
+    MONITOR_CONCURRENCY páginas em memória ao mesmo tempo."""
+    while True:
+        try:
+            youtube_id, subscribers = jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        
+        info = state = None
+        try:
+            info, state = await asyncio.wait_for(check_channel(youtube_id, subscribers),
+                                                 timeout=CHANNEL_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⏰ Timeout verificando {subscribers[0].youtube_name} ({CHANNEL_TIMEOUT:.0f}s)")
+        except Exception as e:
+            print(f"❌ Erro monitorando {subscribers[0].youtube_name}: {e}")
+        
+        await results.put((youtube_id, subscribers, info, state))
+
+@tasks.loop(seconds=SCHEDULER_TICK)
+async def multi_channel_monitor():
+    """Monitoramento MULTI-CANAL com intervalo adaptativo por canal.
+    
+    A cada SCHEDULER_TICK segundos verifica só os canais vencidos no
+    ChannelScheduler. Cada canal do YouTube é baixado e analisado UMA vez
+    por verificação, e o resultado é distribuído para todos os servidores
+    inscritos nele. Os canais são verificados por um pool de
+    MONITOR_CONCURRENCY workers e as notificações saem conforme cada
+    resultado fica pronto."""
+    await bot.wait_until_ready()
+    
+    # Direto do índice por canal do registro: sem ordenar nem reagrupar as inscrições
+    groups = {}
+    for youtube_id, channel in db.registry.by_channel.items():
+        subscribers = [config for config in channel.values()
+                       if config.notify_videos or config.notify_lives or config.notify_scheduled]
+        if youtube_id and subscribers:
+            groups[youtube_id] = subscribers
+    scheduler.sync(groups)
+    # Mesmo sem canais: sync com o conjunto vazio cancela as assinaturas restantes
+    if bot.websub:
+        scheduler.push_active = {youtube_id for youtube_id in groups if bot.websub.active(youtube_id)}
+        if bot.websub_sync is None or bot.websub_sync.done():
+            bot.websub_sync = asyncio.create_task(
+                bot.websub.sync({youtube_id for youtube_id in groups if youtube_id.startswith('UC')}))
+    if not groups:
+        return
+    
+    await scheduler.refresh()
+    scheduler.start_bursts()
+    due = scheduler.pop_due()
+    if not due:
+        return
+    
+    page_cache.prune(groups, {subscribers[0].youtube_url for subscribers in groups.values()} |
+                             {FEED_URL.format(youtube_id) for youtube_id in groups})
+    subscriptions = sum(len(subscribers) for subscribers in groups.values())
+    print(f"⚡ Verificando {len(due)} de {len(groups)} canais ({subscriptions} inscrições) "
+          f"em {len(db.registry.by_guild)} servidores...")
+    
+    jobs = asyncio.Queue()
+    for youtube_id in due:
+        jobs.put_nowait((youtube_id, groups[youtube_id]))
+    results = asyncio.Queue(maxsize=MONITOR_CONCURRENCY)
+    pending = set(due)
+    
+    workers = [asyncio.create_task(monitor_worker(jobs, results))
+               for _ in range(min(MONITOR_CONCURRENCY, len(due)))]
+    
+    try:
+        for _ in range(len(due)):
+            youtube_id, subscribers, info, state = await results.get()
+            pending.discard(youtube_id)
+            scheduler.reschedule(youtube_id, info)
+            if not info:
+                continue
+            
+            try:
+                await notify_subscribers(youtube_id, subscribers, info)
+                # Só depois de notificar: se falhar, a próxima verificação refaz
+                page_cache.states[youtube_id] = state
+            except Exception as e:
+                print(f"❌ Erro notificando {subscribers[0].youtube_name}: {e}")
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for youtube_id in pending:
+            scheduler.reschedule(youtube_id)
+        # Todas as escritas do ciclo numa transação só
+        await db.flush()
+    
+    print(f"♻️ Cache de páginas: {page_cache.stats()}")
+    print(f"🗂️ Cache de canais: {snapshots.stats()}")
+    print(f"📨 Envios: {dispatcher.stats()}")
+
+@tasks.loop(hours=HISTORY_PRUNE_HOURS)
+async def history_maintenance():
+    """Limpeza do banco: histórico vencido, vídeos órfãos e inscrições removidas"""
+    keep_since = None
+    if HISTORY_RETENTION_DAYS > 0:
+        keep_since = datetime.now() - timedelta(days=max(HISTORY_RETENTION_DAYS, ACTIVITY_DAYS))
+    try:
+        events, videos, configs = await db.prune_history(keep_since)
+    except sqlite3.Error as e:
+        print(f"❌ Erro limpando o histórico: {e}")
+        return
+    if events or videos or configs:
+        print(f"🧹 Limpeza: {events} notificações antigas, {videos} vídeos e {configs} inscrições removidas")
+
+@tasks.loop(hours=ALIAS_REVALIDATE_HOURS)
+async def alias_maintenance():
+    """Resolve inscrições com ID provisório para o ID UC... e revalida apelidos antigos"""
+    provisional = {}
+    for config in await db.get_all_configs():
+        if not config.youtube_id.startswith('UC'):
+            provisional.setdefault(config.youtube_id, config.youtube_url)
+    
+    for old_id, url in provisional.items():
+        info = await extract_youtube_info(url)
+        youtube_id = info['channel_id'] if info else None
+        if not youtube_id or not youtube_id.startswith('UC'):
+            continue
+        try:
+            await db.save_alias(url, youtube_id)
+            moved, merged = await db.canonicalize_channel(old_id, youtube_id)
+        except sqlite3.Error as e:
+            print(f"❌ Erro resolvendo {old_id}: {e}")
+            continue
+        print(f"🔗 {old_id} -> {youtube_id}: {moved} inscrição(ões) movidas, {merged} juntadas")
+    
+    # Handles mudam de dono: o apelido passa a apontar para o canal atual
+    # (as inscrições continuam no ID UC... de quando foram feitas)
+    for alias, youtube_id in await db.get_stale_aliases(datetime.now() - timedelta(days=ALIAS_MAX_AGE_DAYS)):
+        info = await extract_youtube_info(key_url(alias))
+        new_id = info['channel_id'] if info else None
+        if not new_id or not new_id.startswith('UC'):
             continue
+        if new_id != youtube_id:
+            print(f"🔗 {alias} agora é {new_id} (era {youtube_id})")
+        await db.save_alias(key_url(alias), new_id)
 
 # ========== EVENTOS ==========
 @bot.event
 async def on_ready():
     print(f'✅ Bot online: {bot.user.name}')
     print(f'⚡ YouTube Monitor MULTI-CANAL')
-    print(f'⏰ Verificação: A cada 30 segundos!')
+    print(f'⏰ Verificação: a cada {POLL_MIN}-{POLL_MAX} segundos, conforme a atividade')
     print('=' * 50)
     
     # Adiciona cog de comandos
@@ -1555,14 +2951,18 @@ async def on_ready():
     
     # Inicia monitoramento MULTI-CANAL
     multi_channel_monitor.start()
+    if not history_maintenance.is_running():
+        history_maintenance.start()
+    if not alias_maintenance.is_running():
+        alias_maintenance.start()
     
     # Verifica quantos canais estão sendo monitorados
-    configs = db.get_all_configs()
-    servers = set(c[1] for c in configs) if configs else set()
+    configs = await db.get_all_configs()
+    servers = set(c.server_id for c in configs) if configs else set()
     print(f'📊 Estatísticas:')
     print(f'   • Servidores: {len(servers)}')
     print(f'   • Canais YouTube: {len(configs)}')
-    print(f'   • Monitoramento ativo: {len([c for c in configs if c[13] or c[14] or c[15]])}')
+    print(f'   • Monitoramento ativo: {len([c for c in configs if c.notify_videos or c.notify_lives or c.notify_scheduled])}')
     
     # Status do bot
     await bot.change_presence(activity=discord.Activity(
@@ -1576,7 +2976,7 @@ async def on_guild_join(guild):
         if channel.permissions_for(guild.me).send_messages:
             embed = discord.Embed(
                 title="⚡ **YouTube Monitor MULTI-CANAL**",
-                description="**Monitoramento a cada 30 segundos!**\n\n"
+                description=f"**Monitoramento adaptativo: de {POLL_MIN} s a {POLL_MAX // 60} min, conforme a atividade!**\n\n"
                           "**Recursos MULTI-CANAL:**\n"
                           "• ✅ **Múltiplos canais por servidor**\n"
                           "• ✅ **Monitoramento simultâneo**\n"
@@ -1606,7 +3006,7 @@ async def on_guild_join(guild):
 # ========== INICIAR ==========
 if __name__ == "__main__":
     print('🚀 Iniciando YouTube Monitor MULTI-CANAL...')
-    print('⚡ Verificação: A cada 30 segundos!')
+    print(f'⚡ Verificação: a cada {POLL_MIN}-{POLL_MAX} segundos, conforme a atividade')
     print('🎯 Sistema MULTI-CANAL: Um servidor pode monitorar VÁRIOS canais!')
     print('📊 Monitoramento simultâneo de múltiplos canais YouTube')
     print('=' * 50)
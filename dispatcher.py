@@ -0,0 +1,179 @@
+"""Fila de envio das notificações para o Discord, fora do caminho do monitor.
+
+O monitor só chama `submit()`, que nunca espera: o evento entra na fila do
+canal de destino e uma tarefa por destino cuida do envio. Cada destino tem
+um balde de fichas (token bucket) no ritmo que o Discord aceita por canal,
+então um canal com muitos eventos espera sozinho, sem segurar os outros.
+
+Eventos que se acumulam no mesmo destino saem juntos numa mensagem só, com
+até MAX_EMBEDS embeds. Lives têm uma faixa própria: entram primeiro no lote
+do destino e passam na frente na disputa pelas vagas de envio.
+
+Não depende do discord: `channel` é qualquer objeto com
+`send(content, embeds=[...])` e `id`.
+"""
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+
+LIVE = 0    # faixa prioritária
+NORMAL = 1  # vídeos e lives programadas
+
+MAX_EMBEDS = 10         # limite do Discord por mensagem
+MAX_CONTENT = 2000
+
+
+class TokenBucket:
+    """`rate` fichas por segundo, acumulando até `capacity`"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Consome uma ficha e devolve 0, ou devolve quantos segundos faltam para ter uma"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class PriorityLimiter:
+    """Semáforo em que, havendo fila, quem tem prioridade menor entra antes"""
+    def __init__(self, slots):
+        self.free = slots
+        self.waiting = []
+        self.order = itertools.count()
+
+    async def acquire(self, priority):
+        if self.free > 0 and not self.waiting:
+            self.free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self.order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # a vaga chegou junto com o cancelamento
+            raise
+
+    def release(self):
+        while self.waiting:
+            _, _, future = heapq.heappop(self.waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+
+class Destination:
+    """Fila de um canal do Discord: uma deque por faixa e o balde de fichas"""
+    def __init__(self, channel, bucket):
+        self.channel = channel
+        self.bucket = bucket
+        self.lanes = (deque(), deque())
+        self.task = None
+
+    def __bool__(self):
+        return any(self.lanes)
+
+    def take_batch(self):
+        """Eventos para uma mensagem: lives primeiro, sem passar de MAX_EMBEDS embeds"""
+        batch = []
+        embeds = 0
+        for lane in self.lanes:
+            while lane:
+                content, event_embeds = lane[0]
+                if batch and embeds + len(event_embeds) > MAX_EMBEDS:
+                    return batch
+                lane.popleft()
+                batch.append((content, event_embeds))
+                embeds += len(event_embeds)
+        return batch
+
+
+def merge_batch(batch):
+    """Um lote de eventos -> (texto, embeds) de uma mensagem"""
+    contents = []
+    embeds = []
+    for content, event_embeds in batch:
+        if content and content not in contents:
+            contents.append(content)
+        embeds.extend(event_embeds)
+    return '\n'.join(contents)[:MAX_CONTENT] or None, embeds[:MAX_EMBEDS]
+
+
+class NotificationDispatcher:
+    """Envia as notificações de cada destino no ritmo dele, em lotes.
+
+    `rate`/`burst`: mensagens por segundo e rajada máxima por canal;
+    `concurrency`: quantos envios ao Discord podem estar em andamento."""
+    def __init__(self, rate=1.0, burst=5, concurrency=4):
+        self.rate = rate
+        self.burst = burst
+        self.limiter = PriorityLimiter(concurrency)
+        self.destinations = {}
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+
+    def submit(self, channel, content=None, embeds=(), priority=NORMAL):
+        """Põe o evento na fila do canal e volta na hora"""
+        destination = self.destinations.get(channel.id)
+        if destination is None:
+            destination = Destination(channel, TokenBucket(self.rate, self.burst))
+            self.destinations[channel.id] = destination
+        destination.channel = channel
+        destination.lanes[priority].append((content, list(embeds)))
+        if destination.task is None or destination.task.done():
+            destination.task = asyncio.create_task(self.drain(destination))
+
+    async def drain(self, destination):
+        """Esvazia a fila de um destino, respeitando o balde e a prioridade"""
+        while destination:
+            wait = destination.bucket.take()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+
+            priority = LIVE if destination.lanes[LIVE] else NORMAL
+            await self.limiter.acquire(priority)
+            try:
+                # Monta o lote só agora: o que chegou enquanto esperava vai junto
+                batch = destination.take_batch()
+                if not batch:
+                    break
+                content, embeds = merge_batch(batch)
+                await destination.channel.send(content, embeds=embeds)
+                self.sent += 1
+                self.merged += len(batch) - 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Erro enviando notificação para o canal {destination.channel.id}: {e}")
+            finally:
+                self.limiter.release()
+
+    def pending(self):
+        return sum(len(lane) for destination in self.destinations.values() for lane in destination.lanes)
+
+    async def close(self, timeout=5):
+        """Espera (até `timeout` s) o que está na fila sair e cancela o resto"""
+        tasks = [destination.task for destination in self.destinations.values()
+                 if destination.task and not destination.task.done()]
+        if not tasks:
+            return
+        done, still_running = await asyncio.wait(tasks, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+    def stats(self):
+        return (f"{self.sent} mensagens • {self.merged} eventos agrupados • "
+                f"{self.failed} falhas • {self.pending()} na fila")
@@ -0,0 +1,119 @@
+"""Varredura por regex do HTML, usada quando o ytInitialData não resolve tudo.
+
+Todos os padrões ficam compilados desde a importação, agrupados por campo em
+ordem de prioridade. Cada campo para no primeiro match aceito, e os vídeos
+são lidos com finditer só até o limite em vez de findall na página inteira.
+
+Juntar tudo numa alternância única (uma passada só) foi medido e é bem mais
+lento no `re` do CPython: a alternância perde a busca rápida pelo prefixo
+literal de cada padrão e testa todas as opções em cada posição da página.
+Padrões com retrocesso caro ganham um "portão": um literal obrigatório que,
+se não existir na página, dispensa rodar o padrão.
+"""
+import re
+
+
+# ========== PADRÕES (em ordem de prioridade) ==========
+NAME_PATTERNS = [
+    r'<meta property="og:title" content="([^"]+)"',
+    r'<meta name="title" content="([^"]+)"',
+    r'<title>([^<]+) - YouTube</title>',
+    r'"author":"([^"]+)"',
+    r'"channelName":"([^"]+)"',
+    r'"title":"([^"]+)"[^}]*"canonicalBaseUrl":"/@[^"]+"',
+    r'"header":"c4TabbedHeaderRenderer"[^}]+"title":"([^"]+)"',
+]
+
+ID_PATTERNS = [
+    r'"channelId":"([^"]+)"',
+    r'"browseId":"([^"]+)"',
+    r'<link rel="canonical" href="https://www\.youtube\.com/channel/([^"]+)"',
+    r'"externalId":"([^"]+)"',
+    r'data-channel-external-id="([^"]+)"',
+]
+
+LIVE_PATTERNS = [
+    r'"isLive":true',
+    r'"isLiveBroadcast":true',
+    r'"style":"LIVE"',
+    r'"badges":\[[^\]]*"live"[^\]]*\]',
+    r'<span[^>]*aria-label="[^"]*AO VIVO[^"]*"',
+    r'<span[^>]*class="[^"]*badge-style-type-live[^"]*"',
+    r'<link[^>]*content="https://www\.youtube\.com/watch\?v=[^"]*"[^>]*type="application/x\+youtube-live-message"',
+]
+
+LIVE_INFO_PATTERNS = [
+    r'"videoId":"([^"]+)"[^}]*"title":\{"runs":\[\{"text":"([^"]+)"',
+    r'"videoId":"([^"]+)"[^}]*"title":\{"simpleText":"([^"]+)"',
+    r'watch\?v=([^"&]+)[^>]*title="([^"]+)"[^>]*aria-label="[^"]*AO VIVO',
+    r'<meta property="og:title" content="([^"]+)[^"]*AO VIVO[^"]*"[^>]*>\s*<meta property="og:url" content="[^"]*v=([^"&]+)"',
+]
+
+VIDEO_PATTERNS = [
+    r'"videoId":"([^"]+)"[^}]*"title":\{"runs":\[\{"text":"([^"]+)"[^}]*"thumbnail":\{"thumbnails":\[\{"url":"([^"]+)"',
+    r'"videoId":"([^"]+)"[^}]*"title":\{"simpleText":"([^"]+)"[^}]*"thumbnail":\{"thumbnails":\[\{"url":"([^"]+)"',
+    r'<a[^>]*href="/watch\?v=([^"&]+)"[^>]*title="([^"]+)"[^>]*><img[^>]*src="([^"]+)"',
+    r'ytInitialData["\'][^}]+"videoId":"([^"]+)"[^}]+"title":\{[^}]+\}[^}]+"thumbnail":\{[^}]+\}[^}]+"publishedTimeText":\{[^}]+\}[^}]+"simpleText":"([^"]+)"',
+]
+
+SIMPLE_VIDEO_PATTERNS = [
+    r'watch\?v=([^"&]+)',
+]
+
+
+def accept_name(match):
+    name = match.group(1).strip()
+    return bool(name) and len(name) > 2 and 'YouTube' not in name
+
+def accept_id(match):
+    channel_id = match.group(1)
+    return bool(channel_id) and ('UC' in channel_id or channel_id.startswith('@'))
+
+# campo -> (padrões, flags, validação); sem validação qualquer match vale
+SLOTS = {
+    'channel_name': (NAME_PATTERNS, re.IGNORECASE, accept_name),
+    'channel_id': (ID_PATTERNS, 0, accept_id),
+    'is_live': (LIVE_PATTERNS, re.IGNORECASE, None),
+    'live_info': (LIVE_INFO_PATTERNS, re.IGNORECASE, None),
+    'videos': (VIDEO_PATTERNS, re.IGNORECASE, None),
+    'simple_video': (SIMPLE_VIDEO_PATTERNS, 0, None),
+}
+
+COMPILED = {
+    slot: [re.compile(pattern, flags) for pattern in patterns]
+    for slot, (patterns, flags, _) in SLOTS.items()
+}
+
+# Literais obrigatórios de padrões caros: se faltar algum, o padrão nem roda.
+# `watch\?v=([^"&]+)[^>]*title=` retrocede quadraticamente em páginas com
+# muitos links e poucos '>' (segundos numa página de 600 KB).
+GATES = {
+    ('live_info', 2): [re.compile(literal, re.IGNORECASE)
+                       for literal in ('aria-label="', 'AO VIVO', 'title="')],
+}
+
+# Padrões de ID na URL do canal
+URL_CHANNEL_RE = re.compile(r'/channel/([^/?]+)')
+URL_HANDLE_RE = re.compile(r'/@([^/?]+)')
+URL_CUSTOM_RE = re.compile(r'/c/([^/?]+)')
+NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+
+
+def find(html, slot):
+    """Primeiro match aceito do campo `slot`: (índice do padrão, match) ou None.
+
+    Mesmo resultado da cadeia antiga de re.search: vale o padrão de maior
+    prioridade cujo primeiro match na página passa na validação."""
+    accept = SLOTS[slot][2]
+    for index, regex in enumerate(COMPILED[slot]):
+        gate = GATES.get((slot, index), ())
+        if not all(literal.search(html) for literal in gate):
+            continue
+        match = regex.search(html)
+        if match and (accept is None or accept(match)):
+            return index, match
+    return None
+
+def iter_matches(slot, index, html, start=0):
+    """Matches seguintes do padrão vencedor (ex.: os vídeos depois do primeiro)"""
+    return COMPILED[slot][index].finditer(html, start)
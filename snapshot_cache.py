@@ -0,0 +1,118 @@
+"""Cache curto das informações já analisadas de cada canal.
+
+Comandos e monitor pedem a mesma página várias vezes em poucos segundos
+(dois servidores com o mesmo canal, um !yt_now disputando com o monitor).
+Aqui fica o último resultado de cada canal por `ttl` segundos, com
+descarte do menos usado quando passa de `max_entries` entradas ou de
+`max_bytes` (tamanho aproximado pelo repr do resultado).
+
+Pedidos simultâneos do mesmo canal esperam uma busca só (single-flight):
+quem chega depois aguarda a que já está em andamento. Se quem pediu
+desistir (cancelamento), a busca continua para os outros e para o cache.
+
+Não depende do discord: a chave vem de `channel_key(url)` e a busca é
+qualquer corrotina sem argumentos.
+"""
+import time
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlsplit, unquote
+
+
+def channel_key(url):
+    """Forma canônica da URL do canal: 'channel/UC...', '@handle' ou 'c/nome'.
+
+    youtube.com/@Nome, https://www.youtube.com/@nome/videos e m.youtube.com/@nome
+    viram a mesma chave. URLs fora desses formatos voltam como estão."""
+    if not url:
+        return url
+    parts = urlsplit(url if '//' in url else f'//{url}')
+    segments = [unquote(s) for s in parts.path.split('/') if s]
+    if not segments:
+        return url
+    if segments[0].startswith('@'):
+        return segments[0].lower()
+    if len(segments) > 1 and segments[0] == 'channel':
+        return f'channel/{segments[1]}'  # IDs UC... diferenciam maiúsculas
+    if len(segments) > 1 and segments[0] in ('c', 'user'):
+        return f'{segments[0]}/{segments[1].lower()}'
+    return url
+
+def key_url(key):
+    """URL do canal a partir da chave de channel_key"""
+    if key.startswith('@') or key.startswith(('channel/', 'c/', 'user/')):
+        return f'https://www.youtube.com/{key}'
+    return key
+
+
+class SnapshotCache:
+    """{chave: (validade, tamanho, resultado)} em ordem de uso, mais busca em andamento por chave"""
+    def __init__(self, ttl=60, max_entries=500, max_bytes=8 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def peek(self, key):
+        """Resultado ainda válido da chave (ou None), marcando como usado"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self.discard(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key, value):
+        """Guarda o resultado e descarta os menos usados se passar dos limites"""
+        if value is None:
+            return
+        self.discard(key)
+        size = len(repr(value))
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, oldest_size, _) = self.entries.popitem(last=False)
+            self.size -= oldest_size
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= entry[1]
+
+    async def get(self, key, fetch):
+        """Resultado da chave: do cache, da busca em andamento ou de `fetch()`.
+
+        Resultados None (falha) não ficam guardados."""
+        value = self.peek(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self.inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(fetch())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self.finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def finish(self, key, task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    def stats(self):
+        return (f"{len(self.entries)} canais ({self.size // 1024} KB) • "
+                f"{self.hits} acertos • {self.misses} buscas • {self.coalesced} compartilhadas")
@@ -0,0 +1,167 @@
+"""Receptor WebSub (PubSubHubbub) para avisos de vídeo novo do YouTube.
+
+O bot sobe um servidor aiohttp.web pequeno, assina no hub o feed de cada
+canal UC..., responde ao desafio de verificação do hub e recebe os avisos
+Atom por POST. As assinaturas têm prazo (lease) e são renovadas antes de
+vencer por `sync()`, chamado periodicamente pelo monitor.
+
+Não depende do discord: o aviso chega ao bot pelo callback
+`on_notification(channel_id, feed)`, com `feed` no mesmo formato de
+youtube_parser.VideoFeedParser.result(). O hub local de websub_hub.py
+permite testar o fluxo inteiro sem internet.
+"""
+import hmac
+import time
+import hashlib
+import secrets
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+from aiohttp import web
+
+from youtube_parser import parse_video_feed
+
+HUB_URL = 'https://pubsubhubbub.appspot.com/subscribe'
+TOPIC_URL = 'https://www.youtube.com/xml/feeds/videos.xml?channel_id={}'
+
+DEFAULT_LEASE = 5 * 24 * 3600
+RENEW_MARGIN = 12 * 3600   # renova quando faltar menos que isso
+RETRY_AFTER = 600          # pedido sem verificação do hub é refeito depois disso
+
+
+def topic_channel_id(topic):
+    """channel_id do tópico do feed (ou None se não for um feed de canal)"""
+    values = parse_qs(urlsplit(topic or '').query).get('channel_id')
+    return values[0] if values else None
+
+class WebSubReceiver:
+    """Assinaturas WebSub dos canais e o servidor que recebe os avisos.
+
+    `leases` guarda o vencimento (time.time()) das assinaturas confirmadas
+    pelo hub; `requested`, os pedidos ainda sem confirmação."""
+    def __init__(self, get_session, callback_url, on_notification, hub_url=HUB_URL,
+                 lease=DEFAULT_LEASE, secret=None, host='0.0.0.0', port=8080):
+        self.get_session = get_session
+        self.callback_url = callback_url
+        self.on_notification = on_notification
+        self.hub_url = hub_url
+        self.lease = lease
+        self.secret = secret or secrets.token_hex(16)
+        self.host = host
+        self.port = port
+        self.leases = {}
+        self.requested = {}
+        self.unsubscribing = set()
+        self.runner = None
+        self.received = 0
+
+    # ========== SERVIDOR ==========
+    async def start(self):
+        app = web.Application()
+        path = urlsplit(self.callback_url).path or '/'
+        app.router.add_get(path, self.handle_verification)
+        app.router.add_post(path, self.handle_notification)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        print(f"✅ WebSub ouvindo em {self.host}:{self.port}{path}")
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_verification(self, request):
+        """Desafio do hub: confirma só assinaturas que este bot pediu"""
+        query = request.query
+        mode = query.get('hub.mode')
+        channel_id = topic_channel_id(query.get('hub.topic'))
+        challenge = query.get('hub.challenge', '')
+
+        if mode == 'subscribe' and channel_id in self.requested:
+            lease = int(query.get('hub.lease_seconds') or self.lease)
+            self.leases[channel_id] = time.time() + lease
+            del self.requested[channel_id]
+            return web.Response(text=challenge)
+
+        if mode == 'unsubscribe' and channel_id in self.unsubscribing:
+            self.unsubscribing.discard(channel_id)
+            self.leases.pop(channel_id, None)
+            return web.Response(text=challenge)
+
+        if mode == 'denied':
+            print(f"⚠️ Hub recusou assinatura de {channel_id}: {query.get('hub.reason', '')}")
+            self.requested.pop(channel_id, None)
+            return web.Response(text='')
+
+        return web.Response(status=404)
+
+    async def handle_notification(self, request):
+        """Aviso Atom do hub (assinado com HMAC do segredo da assinatura)"""
+        body = await request.read()
+        signature = request.headers.get('X-Hub-Signature', '')
+        method, _, digest = signature.partition('=')
+        algorithm = getattr(hashlib, method, None) if method in ('sha1', 'sha256') else None
+        expected = hmac.new(self.secret.encode(), body, algorithm).hexdigest() if algorithm else ''
+        if not expected or not hmac.compare_digest(expected, digest):
+            # Pela especificação responde 2xx mesmo assim, mas ignora o aviso
+            print("⚠️ Aviso WebSub com assinatura inválida ignorado")
+            return web.Response(status=202)
+
+        try:
+            feed = parse_video_feed(body)
+        except Exception as e:
+            print(f"⚠️ Aviso WebSub inválido: {e}")
+            return web.Response(status=202)
+
+        channel_id = feed.get('channel_id') or request.query.get('channel_id')
+        if channel_id and feed['recent_videos']:
+            self.received += 1
+            try:
+                await self.on_notification(channel_id, feed)
+            except Exception as e:
+                print(f"❌ Erro tratando aviso WebSub de {channel_id}: {e}")
+        return web.Response(status=204)
+
+    # ========== ASSINATURAS ==========
+    async def request(self, channel_id, mode):
+        """Envia subscribe/unsubscribe ao hub; a confirmação chega no desafio"""
+        data = {
+            'hub.mode': mode,
+            'hub.topic': TOPIC_URL.format(channel_id),
+            'hub.callback': f"{self.callback_url}?{urlencode({'channel_id': channel_id})}",
+            'hub.verify': 'async',
+        }
+        if mode == 'subscribe':
+            data['hub.lease_seconds'] = str(self.lease)
+            data['hub.secret'] = self.secret
+        try:
+            async with self.get_session().post(self.hub_url, data=data) as response:
+                if response.status in (202, 204):
+                    return True
+                print(f"⚠️ Hub respondeu {response.status} para {mode} de {channel_id}")
+        except Exception as e:
+            print(f"Erro no hub WebSub ({mode} {channel_id}): {e}")
+        return False
+
+    async def sync(self, channel_ids):
+        """Assina canais novos, renova leases perto do fim e cancela os removidos"""
+        now = time.time()
+        for channel_id in channel_ids:
+            expires = self.leases.get(channel_id)
+            if expires and expires - now > RENEW_MARGIN:
+                continue
+            if now - self.requested.get(channel_id, 0) < RETRY_AFTER:
+                continue
+            self.requested[channel_id] = now
+            await self.request(channel_id, 'subscribe')
+
+        for channel_id in [c for c in self.requested if c not in channel_ids]:
+            del self.requested[channel_id]
+        for channel_id in [c for c in self.leases if c not in channel_ids]:
+            self.unsubscribing.add(channel_id)
+            self.leases.pop(channel_id)
+            await self.request(channel_id, 'unsubscribe')
+
+    def active(self, channel_id):
+        """Assinatura confirmada e dentro do prazo"""
+        return self.leases.get(channel_id, 0) > time.time()
@@ -0,0 +1,180 @@
+"""Hub WebSub local, para testar o modo push sem internet.
+
+Faz o papel do pubsubhubbub.appspot.com: aceita assinaturas, confirma com o
+desafio no callback e repassa avisos Atom assinados com HMAC.
+
+Uso:
+    python websub_hub.py [--port 8081]
+        Sobe o hub. Rode o bot com
+            WEBSUB_HUB=http://localhost:8081/subscribe
+            WEBSUB_CALLBACK_URL=http://localhost:8080/websub
+        e publique um vídeo falso com
+            curl -X POST "http://localhost:8081/publish?channel_id=UC...&video_id=abc123&title=Teste"
+
+    python websub_hub.py --selftest
+        Sobe hub e receptor no mesmo processo e confere o fluxo inteiro:
+        assinatura, desafio, aviso e callback.
+"""
+import sys
+import hmac
+import asyncio
+import hashlib
+import secrets
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+import aiohttp
+from aiohttp import web
+
+from websub import WebSubReceiver, TOPIC_URL
+
+ATOM_ENTRY = '''<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+ <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+ <link rel="self" href="{topic}"/>
+ <title>YouTube video feed</title>
+ <updated>{now}</updated>
+ <entry>
+  <id>yt:video:{video_id}</id>
+  <yt:videoId>{video_id}</yt:videoId>
+  <yt:channelId>{channel_id}</yt:channelId>
+  <title>{title}</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  <author><name>Canal de teste</name></author>
+  <published>{now}</published>
+  <updated>{now}</updated>
+ </entry>
+</feed>
+'''
+
+
+class LocalHub:
+    """Assinaturas em memória: {tópico: {callback: segredo}}"""
+    def __init__(self):
+        self.subscriptions = {}
+        self.session = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/subscribe', self.handle_subscribe)
+        app.router.add_post('/publish', self.handle_publish)
+        app.on_startup.append(self.open_session)
+        app.on_cleanup.append(self.close_session)
+        return app
+
+    async def open_session(self, app):
+        self.session = aiohttp.ClientSession()
+
+    async def close_session(self, app):
+        await self.session.close()
+
+    async def handle_subscribe(self, request):
+        form = await request.post()
+        mode = form.get('hub.mode')
+        topic = form.get('hub.topic')
+        callback = form.get('hub.callback')
+        if mode not in ('subscribe', 'unsubscribe') or not topic or not callback:
+            return web.Response(status=400, text='pedido inválido')
+
+        asyncio.create_task(self.verify(mode, topic, callback, form.get('hub.secret', ''),
+                                        form.get('hub.lease_seconds', '432000')))
+        return web.Response(status=202)
+
+    async def verify(self, mode, topic, callback, secret, lease):
+        """Confirma a intenção com o desafio, como o hub de verdade faz"""
+        challenge = secrets.token_hex(8)
+        params = {'hub.mode': mode, 'hub.topic': topic,
+                  'hub.challenge': challenge, 'hub.lease_seconds': lease}
+        async with self.session.get(callback, params=params) as response:
+            ok = response.status == 200 and (await response.text()) == challenge
+
+        if ok and mode == 'subscribe':
+            self.subscriptions.setdefault(topic, {})[callback] = secret
+        elif ok:
+            self.subscriptions.get(topic, {}).pop(callback, None)
+        print(f"🔁 {mode} {'confirmado' if ok else 'recusado pelo callback'}: {topic}")
+
+    async def publish(self, channel_id, video_id, title):
+        """Envia o aviso Atom para todos os callbacks do canal; devolve quantos aceitaram"""
+        topic = TOPIC_URL.format(channel_id)
+        body = ATOM_ENTRY.format(
+            topic=topic, channel_id=channel_id, video_id=video_id, title=escape(title),
+            now=datetime.now(timezone.utc).isoformat(timespec='seconds')).encode()
+
+        delivered = 0
+        for callback, secret in self.subscriptions.get(topic, {}).items():
+            signature = hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+            headers = {'Content-Type': 'application/atom+xml', 'X-Hub-Signature': f'sha1={signature}'}
+            async with self.session.post(callback, data=body, headers=headers) as response:
+                delivered += 200 <= response.status < 300
+        return delivered
+
+    async def handle_publish(self, request):
+        query = request.query
+        delivered = await self.publish(query['channel_id'], query.get('video_id', secrets.token_hex(5)),
+                                       query.get('title', 'Vídeo de teste'))
+        return web.Response(text=f"entregue para {delivered} callback(s)\n")
+
+
+async def selftest(hub_port=8081, receiver_port=8080):
+    """Fluxo inteiro em um processo: assina, confirma, publica e recebe"""
+    hub = LocalHub()
+    hub_runner = web.AppRunner(hub.app())
+    await hub_runner.setup()
+    await web.TCPSite(hub_runner, '127.0.0.1', hub_port).start()
+
+    received = asyncio.Queue()
+
+    async def on_notification(channel_id, feed):
+        await received.put((channel_id, feed))
+
+    session = aiohttp.ClientSession()
+    receiver = WebSubReceiver(lambda: session, f'http://127.0.0.1:{receiver_port}/websub',
+                              on_notification, hub_url=f'http://127.0.0.1:{hub_port}/subscribe',
+                              host='127.0.0.1', port=receiver_port)
+    await receiver.start()
+
+    try:
+        channel_id = 'UCselftest000000000000'
+        await receiver.sync({channel_id})
+        for _ in range(50):
+            if receiver.active(channel_id):
+                break
+            await asyncio.sleep(0.1)
+        assert receiver.active(channel_id), "assinatura não foi confirmada"
+        print("✅ Assinatura confirmada pelo desafio")
+
+        delivered = await hub.publish(channel_id, 'selftest01', 'Vídeo & teste')
+        assert delivered == 1, f"aviso entregue para {delivered} callbacks"
+        got_channel, feed = await asyncio.wait_for(received.get(), timeout=5)
+        assert got_channel == channel_id
+        assert feed['latest_video']['id'] == 'selftest01'
+        assert feed['latest_video']['title'] == 'Vídeo & teste'
+        print(f"✅ Aviso recebido: {feed['latest_video']['title']} ({feed['latest_video']['publish_time']})")
+
+        await receiver.sync(set())
+        await asyncio.sleep(0.5)
+        assert not hub.subscriptions.get(TOPIC_URL.format(channel_id)), "cancelamento não confirmado"
+        print("✅ Cancelamento confirmado")
+    finally:
+        await receiver.stop()
+        await session.close()
+        await hub_runner.cleanup()
+    return 0
+
+
+def main(argv):
+    port = 8081
+    if '--port' in argv:
+        port = int(argv[argv.index('--port') + 1])
+
+    if '--selftest' in argv:
+        return asyncio.run(selftest(hub_port=port))
+
+    print(f"🛰️ Hub WebSub local em http://localhost:{port}/subscribe")
+    web.run_app(LocalHub().app(), port=port, print=None)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
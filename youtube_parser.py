@@ -0,0 +1,523 @@
+"""Análise das páginas de canal do YouTube.
+
+Fica separado do bot para rodar em processos do ProcessPoolExecutor: recebe o
+HTML bruto e devolve um dict pequeno e serializável (picklable), sem tocar
+no event loop do Discord.
+"""
+import os
+import re
+import json
+import zlib
+from datetime import datetime
+from itertools import islice
+from xml.etree import ElementTree
+
+import fallback_scanner
+
+
+# ========== JSON ytInitialData ==========
+def load_json_backend(names=None):
+    """Escolhe a função loads do backend JSON mais rápido instalado.
+    
+    A ordem vem de JSON_BACKEND (ex.: "orjson,ujson"); vazio ou sem nenhum
+    instalado devolve None e o json padrão (raw_decode) é usado. Meça com
+    bench_parser.py antes de ativar: com páginas em str o ganho é pequeno."""
+    names = names if names is not None else os.getenv('JSON_BACKEND', '')
+    for name in names.split(','):
+        name = name.strip()
+        if not name or name == 'json':
+            continue
+        try:
+            module = __import__(name)
+        except ImportError:
+            continue
+        return module.loads
+    return None
+
+fast_json_loads = load_json_backend()
+json_decoder = json.JSONDecoder()
+
+INITIAL_DATA_MARKER = 'ytInitialData'
+SCRIPT_END_RE = re.compile(r';</script>')
+
+def find_initial_data_start(html):
+    """Posição do '{' que abre o ytInitialData, ou -1.
+    
+    Procura o marcador com busca simples de substring e só aceita ocorrências
+    no formato `ytInitialData = {` / `["ytInitialData"] = {`."""
+    pos = html.find(INITIAL_DATA_MARKER)
+    while pos != -1:
+        i = pos + len(INITIAL_DATA_MARKER)
+        # Pula aspas/colchete de window["ytInitialData"] e espaços até o '='
+        while i < len(html) and html[i] in '"\']':
+            i += 1
+        while i < len(html) and html[i].isspace():
+            i += 1
+        if i < len(html) and html[i] == '=':
+            i += 1
+            while i < len(html) and html[i].isspace():
+                i += 1
+            if i < len(html) and html[i] == '{':
+                return i
+        pos = html.find(INITIAL_DATA_MARKER, i)
+    return -1
+
+def find_initial_data(html):
+    """Decodifica exatamente um valor JSON a partir do marcador ytInitialData.
+    
+    Custo linear no tamanho da página. Com um backend rápido instalado, tenta
+    primeiro o trecho até o `;</script>` (que nunca aparece dentro de uma
+    string JSON embutida em <script>); se falhar usa raw_decode, que acha o
+    fim do objeto sozinho. Devolve None se não houver ytInitialData e
+    levanta ValueError se o JSON for inválido."""
+    start = find_initial_data_start(html)
+    if start == -1:
+        return None
+    
+    if fast_json_loads:
+        end = SCRIPT_END_RE.search(html, start)
+        if end:
+            try:
+                return fast_json_loads(html[start:end.start()])
+            except ValueError:
+                pass
+    
+    data, _ = json_decoder.raw_decode(html, start)
+    return data
+
+
+# ========== RENDERERS DO ytInitialData ==========
+MAX_RECENT_VIDEOS = 5
+
+VIDEO_RENDERERS = ('videoRenderer', 'gridVideoRenderer')
+
+# Chaves que levam dos tabs até os renderers de vídeo; o resto é ignorado
+CONTAINER_KEYS = (
+    'tabRenderer', 'content', 'contents', 'items',
+    'richGridRenderer', 'richItemRenderer', 'richSectionRenderer', 'richShelfRenderer',
+    'sectionListRenderer', 'itemSectionRenderer', 'shelfRenderer', 'gridRenderer',
+    'horizontalListRenderer', 'expandedShelfContentsRenderer', 'verticalListRenderer',
+    'channelFeaturedContentRenderer',
+)
+
+def text_of(value):
+    """Texto de um campo do YouTube ({'simpleText': ...} ou {'runs': [...]})"""
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, dict):
+        return ''
+    if 'simpleText' in value:
+        return value['simpleText']
+    return ''.join(run.get('text', '') for run in value.get('runs', ()))
+
+def video_entry(video_id, title, kind, publish_time='Recentemente'):
+    """Dict de vídeo/live no formato usado pelo resto do bot"""
+    return {
+        'id': video_id,
+        'title': title[:100] + "..." if len(title) > 100 else title,
+        'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+        'url': f"https://youtu.be/{video_id}",
+        'publish_time': publish_time,
+        'type': kind
+    }
+
+def is_live_renderer(renderer):
+    """Vídeo com selo AO VIVO / overlay LIVE"""
+    for badge in renderer.get('badges', ()):
+        style = badge.get('metadataBadgeRenderer', {}).get('style', '')
+        if style == 'BADGE_STYLE_TYPE_LIVE_NOW':
+            return True
+    for overlay in renderer.get('thumbnailOverlays', ()):
+        if overlay.get('thumbnailOverlayTimeStatusRenderer', {}).get('style') == 'LIVE':
+            return True
+    return False
+
+def selected_tab_contents(data):
+    """Conteúdo dos tabs do canal, começando pelo tab selecionado"""
+    tabs = (data.get('contents', {})
+                .get('twoColumnBrowseResultsRenderer', {})
+                .get('tabs', ()))
+    contents = []
+    for tab in tabs:
+        renderer = tab.get('tabRenderer')
+        if renderer and 'content' in renderer:
+            if renderer.get('selected'):
+                contents.insert(0, renderer['content'])
+            else:
+                contents.append(renderer['content'])
+    return contents
+
+def walk_initial_data(data, max_videos=MAX_RECENT_VIDEOS):
+    """Lê o ytInitialData indo direto aos renderers relevantes.
+    
+    Nome e ID vêm do metadata/header; vídeos, lives e lives programadas vêm
+    de videoRenderer/gridVideoRenderer dentro dos tabs, em ordem de página e
+    sem repetir IDs. Guarda até `max_videos` vídeos, mas percorre todos os
+    containers: uma prateleira de live ou de live programada pode vir depois
+    dos uploads, e is_live/scheduled_live só valem com a página inteira
+    vista. Devolve só os campos encontrados (mesmas chaves do dict `info`)."""
+    found = {}
+    
+    # Nome e ID do canal
+    metadata = data.get('metadata', {}).get('channelMetadataRenderer', {})
+    header = data.get('header', {})
+    header = header.get('c4TabbedHeaderRenderer') or header.get('pageHeaderRenderer') or {}
+    
+    name = metadata.get('title') or text_of(header.get('title')) or header.get('pageTitle')
+    if name:
+        found['channel_name'] = name
+    
+    channel_id = metadata.get('externalId') or header.get('channelId')
+    if channel_id:
+        found['channel_id'] = channel_id
+    
+    # Vídeos / lives: percorre só os containers, em ordem, sem recursão
+    contents = selected_tab_contents(data)
+    if not contents:
+        return found
+    
+    seen = set()
+    videos = []
+    live_info = None
+    upcoming = None
+    stack = list(reversed(contents))
+    
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        
+        renderer = None
+        for key in VIDEO_RENDERERS:
+            if key in node:
+                renderer = node[key]
+                break
+        
+        if renderer is None:
+            stack.extend(node[key] for key in reversed(CONTAINER_KEYS) if key in node)
+            continue
+        
+        video_id = renderer.get('videoId')
+        if not video_id or video_id in seen:
+            continue
+        seen.add(video_id)
+        title = text_of(renderer.get('title'))
+        
+        if is_live_renderer(renderer):
+            if not live_info:
+                live_info = video_entry(video_id, title, 'live')
+                del live_info['publish_time']
+        elif 'upcomingEventData' in renderer:
+            start_time = int(renderer['upcomingEventData'].get('startTime') or 0)
+            if upcoming is None or start_time < upcoming['start_time']:
+                upcoming = video_entry(video_id, title, 'scheduled')
+                del upcoming['publish_time']
+                upcoming['start_time'] = start_time
+                upcoming['scheduled_time'] = (
+                    datetime.fromtimestamp(start_time).strftime('%d/%m/%Y %H:%M')
+                    if start_time else 'Em breve')
+        elif len(videos) < max_videos:
+            publish_time = text_of(renderer.get('publishedTimeText')) or 'Recentemente'
+            videos.append(video_entry(video_id, title, 'video', publish_time))
+    
+    found['is_live'] = live_info is not None
+    found['live_info'] = live_info
+    found['scheduled_live'] = upcoming
+    found['recent_videos'] = videos
+    if videos:
+        found['latest_video'] = videos[0]
+    return found
+
+
+# ========== IMPRESSÃO DIGITAL DA PÁGINA ==========
+FINGERPRINT_VIDEO_IDS = 30
+VIDEO_ID_MARKER = '"videoId":"'
+START_TIME_RE = re.compile(r'"startTime":"(\d+)"')
+
+def page_fingerprint(html, max_ids=FINGERPRINT_VIDEO_IDS):
+    """Resumo barato do trecho da página que importa para as notificações.
+    
+    Junta os primeiros `max_ids` videoIds (em ordem de página), os selos de
+    live e os horários de lives programadas desse trecho, sem decodificar o
+    JSON. O resto da página (parâmetros de rastreio etc.) muda a cada
+    requisição e fica de fora. Página igual -> mesmo número; sem nenhum
+    videoId devolve None (não dá para comparar)."""
+    ids = []
+    pos = html.find(VIDEO_ID_MARKER)
+    region_start = pos
+    while pos != -1 and len(ids) < max_ids:
+        start = pos + len(VIDEO_ID_MARKER)
+        end = html.find('"', start)
+        if end == -1:
+            break
+        ids.append(html[start:end])
+        pos = html.find(VIDEO_ID_MARKER, end)
+    
+    if not ids:
+        return None
+    
+    region = html[region_start:pos] if pos != -1 else html[region_start:]
+    parts = ids + [
+        str(region.count('BADGE_STYLE_TYPE_LIVE_NOW')),
+        str(region.count('"style":"LIVE"')),
+    ] + START_TIME_RE.findall(region)
+    return zlib.crc32('|'.join(parts).encode())
+
+
+# ========== PÁGINA DO CANAL AOS PEDAÇOS ==========
+PAGE_MAX_BYTES = 4 * 1024 * 1024
+INITIAL_DATA_ASSIGN_RE = re.compile(rb'ytInitialData["\'\]]*\s*=\s*\{')
+SCRIPT_END = b';</script>'
+SCAN_OVERLAP = 64  # um marcador pode chegar cortado entre dois pedaços
+
+class ChannelPageReader:
+    """Junta a página do canal aos pedaços, conforme chega, e diz quando parar.
+
+    Tudo que parse_channel_page e page_fingerprint usam está no <script> do
+    ytInitialData (vídeos, selos de live, lives programadas), e o que vem
+    depois dele não muda o resultado. `done` fica verdadeiro quando esse
+    <script> fecha ou quando a página passa de `max_bytes` (aí `truncated`
+    também). Só procura os marcadores no trecho novo de cada pedaço."""
+    def __init__(self, max_bytes=PAGE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.start = -1     # onde começa o `ytInitialData = {`
+        self.scanned = 0    # até onde o buffer já foi procurado
+        self.done = False
+        self.truncated = False
+
+    def feed(self, chunk):
+        if self.done:
+            return
+        self.buffer += chunk
+        if self.start == -1:
+            match = INITIAL_DATA_ASSIGN_RE.search(self.buffer, max(0, self.scanned - SCAN_OVERLAP))
+            if match:
+                self.start = self.scanned = match.end()
+        if self.start != -1:
+            end = self.buffer.find(SCRIPT_END, max(self.start, self.scanned - len(SCRIPT_END)))
+            if end != -1:
+                del self.buffer[end + len(SCRIPT_END):]
+                self.done = True
+                return
+        self.scanned = len(self.buffer)
+        if len(self.buffer) >= self.max_bytes:
+            del self.buffer[self.max_bytes:]
+            self.done = self.truncated = True
+
+    def text(self, encoding='utf-8'):
+        return self.buffer.decode(encoding, errors='replace')
+
+
+# ========== FEED ATOM (feeds/videos.xml) ==========
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+YT_NS = '{http://www.youtube.com/xml/schemas/2015}'
+
+def feed_publish_time(published):
+    """'2024-05-01T18:30:00+00:00' -> ('01/05/2024 15:30', timestamp) no fuso local"""
+    try:
+        moment = datetime.fromisoformat(published).astimezone()
+    except (TypeError, ValueError):
+        return 'Recentemente', 0
+    return moment.strftime('%d/%m/%Y %H:%M'), int(moment.timestamp())
+
+class VideoFeedParser:
+    """Lê o feed Atom de vídeos de um canal aos pedaços, conforme chega.
+    
+    Usa XMLPullParser: cada <entry> é lido e descartado assim que fecha, e
+    `done` fica verdadeiro quando já há `max_videos` vídeos, para o chamador
+    parar de baixar o resto. `result()` devolve as mesmas chaves do dict
+    `info` que o feed sabe responder (nome, ID e vídeos)."""
+    def __init__(self, max_videos=MAX_RECENT_VIDEOS):
+        self.max_videos = max_videos
+        self.parser = ElementTree.XMLPullParser(events=('end',))
+        self.found = {}
+        self.videos = []
+        self.done = False
+    
+    def feed(self, chunk):
+        if self.done:
+            return
+        self.parser.feed(chunk)
+        for _, elem in self.parser.read_events():
+            if elem.tag == ATOM_NS + 'entry':
+                self.add_entry(elem)
+                elem.clear()
+                if len(self.videos) >= self.max_videos:
+                    self.done = True
+                    return
+            elif elem.tag == YT_NS + 'channelId' and 'channel_id' not in self.found:
+                self.found['channel_id'] = elem.text
+            elif elem.tag == ATOM_NS + 'title' and 'channel_name' not in self.found and not self.videos:
+                # O <title> do feed vem antes das entradas; o das entradas é lido em add_entry
+                self.found['channel_name'] = elem.text
+    
+    def add_entry(self, entry):
+        video_id = entry.findtext(YT_NS + 'videoId')
+        if not video_id:
+            return
+        publish_time, timestamp = feed_publish_time(entry.findtext(ATOM_NS + 'published'))
+        video = video_entry(video_id, entry.findtext(ATOM_NS + 'title') or 'Vídeo recente',
+                            'video', publish_time)
+        video['timestamp'] = timestamp
+        self.videos.append(video)
+    
+    def result(self):
+        found = dict(self.found)
+        found['recent_videos'] = self.videos
+        found['latest_video'] = self.videos[0] if self.videos else None
+        return found
+
+def parse_video_feed(xml):
+    """Feed Atom completo (bytes ou str) de uma vez; ver VideoFeedParser"""
+    reader = VideoFeedParser()
+    reader.feed(xml)
+    return reader.result()
+
+
+def parse_channel_page(html, url):
+    """Extrai informações do canal a partir do HTML - VERSÃO 2024 OTIMIZADA"""
+    info = {
+        'channel_name': 'Canal do YouTube',
+        'channel_id': None,
+        'is_live': False,
+        'live_info': None,
+        'scheduled_live': None,
+        'latest_video': None,
+        'recent_videos': [],
+        'channel_url': url
+    }
+    
+    try:
+        print(f"🔍 Analisando HTML de {url}...")
+        
+        # ========== MÉTODO 1: Busca por JSON ytInitialData ==========
+        # O YouTube armazena dados em um JSON gigante chamado ytInitialData
+        data = None
+        try:
+            data = find_initial_data(html)
+        except ValueError as e:
+            print(f"⚠️ Erro ao decodificar JSON: {e}")
+        
+        found = {}
+        if data is not None:
+            try:
+                print("📊 Extraindo via JSON ytInitialData...")
+                found = walk_initial_data(data)
+                info.update(found)
+                print(f"✅ JSON analisado: {info['channel_name']} (ID: {info['channel_id']})")
+            except Exception as e:
+                found = {}
+                print(f"⚠️ Erro no método JSON: {e}")
+        
+        # ========== MÉTODO 2: Regex modernas para 2024 ==========
+        # Só preenche o que o JSON não encontrou
+        
+        # 1. Nome do canal
+        hit = fallback_scanner.find(html, 'channel_name') if 'channel_name' not in found else None
+        if hit:
+            name = hit[1].group(1).strip()
+            info['channel_name'] = name.replace(' - YouTube', '').replace('\\"', '"')
+            print(f"✅ Nome encontrado via regex: {info['channel_name']}")
+        
+        # 2. ID do canal
+        hit = fallback_scanner.find(html, 'channel_id') if 'channel_id' not in found else None
+        if hit:
+            info['channel_id'] = hit[1].group(1)
+            print(f"✅ ID encontrado via regex: {info['channel_id']}")
+        
+        # Se não encontrou ID ainda, tenta extrair da URL
+        if not info['channel_id']:
+            if '/channel/' in url:
+                match = fallback_scanner.URL_CHANNEL_RE.search(url)
+                if match:
+                    info['channel_id'] = match.group(1)
+            elif '/@' in url:
+                match = fallback_scanner.URL_HANDLE_RE.search(url)
+                if match:
+                    info['channel_id'] = '@' + match.group(1)
+            elif '/c/' in url:
+                match = fallback_scanner.URL_CUSTOM_RE.search(url)
+                if match:
+                    info['channel_id'] = 'c_' + match.group(1)
+        
+        # 3. Verifica se está em live (o JSON já responde isso quando foi lido)
+        if 'is_live' not in found and fallback_scanner.find(html, 'is_live'):
+            info['is_live'] = True
+            print("🎬 Live detectada!")
+        
+        # 4. Informações da live (se houver)
+        hit = fallback_scanner.find(html, 'live_info') if info['is_live'] and not info['live_info'] else None
+        if hit:
+            match = hit[1]
+            video_id = match.group(1)
+            title = match.group(2).replace('\\"', '"')
+            info['live_info'] = {
+                'id': video_id,
+                'title': title,
+                'url': f"https://youtu.be/{video_id}",
+                'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+                'type': 'live'
+            }
+            print(f"✅ Informações da live: {title}")
+        
+        # 5. Vídeos recentes (até 5, a partir do primeiro match do padrão vencedor)
+        hit = fallback_scanner.find(html, 'videos') if not info['latest_video'] else None
+        if hit:
+            index, first = hit
+            matches = fallback_scanner.iter_matches('videos', index, html, first.start())
+            for i, match in enumerate(islice(matches, MAX_RECENT_VIDEOS)):
+                groups = match.groups()
+                video_id = groups[0]
+                title = groups[1].replace('\\"', '"') if len(groups) > 1 else "Vídeo recente"
+                thumbnail = groups[2].replace('\\u0026', '&') if len(groups) > 2 else f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
+                
+                video_info = {
+                    'id': video_id,
+                    'title': title[:100] + "..." if len(title) > 100 else title,
+                    'thumbnail': thumbnail,
+                    'url': f"https://youtu.be/{video_id}",
+                    'publish_time': groups[3] if len(groups) > 3 else 'Recentemente',
+                    'type': 'video'
+                }
+                
+                if i == 0:  # Primeiro vídeo é o mais recente
+                    info['latest_video'] = video_info
+                
+                info['recent_videos'].append(video_info)
+            print(f"📹 Encontrados {len(info['recent_videos'])} vídeos via regex")
+        
+        # 6. Se não encontrou vídeos ainda, usa o padrão mais simples
+        hit = fallback_scanner.find(html, 'simple_video') if not info['latest_video'] else None
+        if hit:
+            video_id = hit[1].group(1)
+            info['latest_video'] = {
+                'id': video_id,
+                'title': 'Vídeo recente',
+                'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+                'url': f"https://youtu.be/{video_id}",
+                'publish_time': 'Recentemente',
+                'type': 'video'
+            }
+            print(f"✅ Vídeo encontrado via padrão simples: {video_id}")
+        
+        # ========== VALIDAÇÃO FINAL ==========
+        # Se não conseguiu ID do canal, cria um baseado no nome
+        if not info['channel_id']:
+            # Cria um ID fictício baseado no nome (para funcionar no banco)
+            clean_name = fallback_scanner.NON_ALNUM_RE.sub('', info['channel_name'])
+            info['channel_id'] = f"custom_{clean_name[:20]}" if clean_name else f"custom_{zlib.crc32(url.encode()) % 10000}"
+            print(f"⚠️ Usando ID customizado: {info['channel_id']}")
+        
+        print(f"✅ Análise concluída: {info['channel_name']}")
+        return info
+        
+    except Exception as e:
+        print(f"❌ Erro crítico ao processar {url}: {e}")
+        import traceback
+        traceback.print_exc()
+    
+    return info